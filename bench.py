@@ -0,0 +1,182 @@
+"""Benchmark simulation throughput of the three games and save the results as JSON.
+
+    python bench.py --output bench_results.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from headless import use_dummy_display
+
+# --- Configuration ---
+CONWAY_SIZES = [(100, 100), (150, 200), (500, 500), (1000, 1000)]
+CONWAY_ENGINES = ["python", "numpy", "bitpacked", "parallel", "sparse"]
+CONWAY_RULES = ["B3/S23", "B36/S23", "B2/S/C3", "R5,C0,M1,S34..58,B34..45,NM"]
+PYTHON_ENGINE_MAX_CELLS = 200 * 150  # The reference loop is too slow beyond this
+SNAKE_TICKS = 500
+SNAKE_BOARDS = 64
+SNAKE_COUNTS = [4, 16, 64, 256]  # Snakes on one big board, to check a tick scales linearly
+SNAKE_BIG_BOARD = (1000, 1000)
+CANNON_PARTICLES = 5000
+MIN_SECONDS = 1.0  # Each benchmark repeats until it has run at least this long
+
+
+def measure(func, min_seconds=MIN_SECONDS):
+    """Call func() until min_seconds have passed; return (calls, seconds)."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return calls, elapsed
+
+
+def result(name, rate, unit, **params):
+    return {"name": name, "params": params, "rate": rate, "unit": unit}
+
+
+# --- Benchmarks ---
+def bench_conway(sizes=CONWAY_SIZES, engines=CONWAY_ENGINES, rules=CONWAY_RULES, min_seconds=MIN_SECONDS):
+    import conway
+    from rules import step_rule
+
+    results = []
+    for height, width in sizes:
+        np.random.seed(0)
+        start_grid = np.random.choice([0, 1], size=(height, width), p=[0.8, 0.2])
+        for engine in engines:
+            if engine == "python" and height * width > PYTHON_ENGINE_MAX_CELLS:
+                continue
+            state = {"grid": start_grid.copy(), "active": None}
+            if engine == "sparse":
+                def step():
+                    state["active"] = conway.step_sparse(state["grid"], state["active"])
+            else:
+                def step():
+                    state["grid"] = conway.update_grid(state["grid"], engine)
+            calls, elapsed = measure(step, min_seconds)
+            results.append(result("conway.update_grid", calls / elapsed, "generations/sec",
+                                  engine=engine, size=f"{width}x{height}"))
+        for rule in rules:
+            state = {"grid": start_grid.copy()}
+            def step():
+                state["grid"] = step_rule(state["grid"], rule)
+            calls, elapsed = measure(step, min_seconds)
+            results.append(result("rules.step_rule", calls / elapsed, "generations/sec",
+                                  rule=rule, size=f"{width}x{height}"))
+    return results
+
+
+def bench_snake(ticks=SNAKE_TICKS, boards=SNAKE_BOARDS, counts=SNAKE_COUNTS, min_seconds=MIN_SECONDS):
+    import dual_snake
+
+    state = {"ticks": 0}
+    def run():
+        state["ticks"] += dual_snake.main(fps=0, max_frames=ticks, seed=0)
+    calls, elapsed = measure(run, min_seconds)
+    results = [result("dual_snake.main", state["ticks"] / elapsed, "ticks/sec", ticks=ticks)]
+
+    env = dual_snake.SnakeEnv(boards, seed=0)
+    def step():
+        if all(env.step()[2]):
+            env.reset(0)
+    calls, elapsed = measure(step, min_seconds)
+    results.append(result("dual_snake.SnakeEnv.step", calls * boards / elapsed, "ticks/sec", boards=boards))
+
+    width, height = SNAKE_BIG_BOARD
+    for count in counts:
+        board = dual_snake.SnakeBoard(0, snakes=count, width=width, height=height, foods=4 * count)
+        calls, elapsed = measure(board.step, min_seconds)
+        results.append(result("dual_snake.SnakeBoard.step", calls * count / elapsed, "snake-ticks/sec",
+                              snakes=count, size=f"{width}x{height}"))
+    return results
+
+
+def bench_cannon(particles=CANNON_PARTICLES, min_seconds=MIN_SECONDS):
+    import cannon
+
+    # The computer player's solve: every legal shot flown to the end at once, uncached
+    game = cannon.CannonGame(seed=0)
+    shooter, opponent = game.cannons
+    angles, powers = np.meshgrid(*cannon.legal_shots(0), indexing="ij")
+    def solve():
+        cannon.integrate_shots(shooter, opponent, angles.ravel(), powers.ravel())
+    calls, elapsed = measure(solve, min_seconds)
+    results = [result("cannon.integrate_shots", calls * angles.size / elapsed, "shots/sec", shots=angles.size)]
+
+    # Fragments scattered over the sky, topped back up to `particles` before every step
+    system = cannon.ParticleSystem(rng=np.random.default_rng(0))
+    def step():
+        n = particles - len(system)
+        pos = np.stack([system.rng.uniform(0, cannon.WIDTH, n), system.rng.uniform(0, cannon.MIN_HEIGHT, n)], axis=1)
+        system.spawn(pos, system.rng.uniform(-4, 4, (n, 2)), cannon.FRAGMENT)
+        system.step(game.terrain, game.cannons)
+    calls, elapsed = measure(step, min_seconds)
+    results.append(result("cannon.ParticleSystem.step", calls / elapsed, "steps/sec", particles=particles))
+
+    # Computer-vs-computer matches stepped headless as fast as they will go
+    match = cannon.CannonGame(seed=0, ai_players={0, 1})
+    state = {"ticks": 0, "seed": 0}
+    def play():
+        match.step()
+        state["ticks"] += 1
+        if match.game_over:
+            state["seed"] += 1
+            match.reset(state["seed"])
+    calls, elapsed = measure(play, min_seconds)
+    results.append(result("cannon.CannonGame.step", state["ticks"] / elapsed, "ticks/sec"))
+    return results
+
+
+BENCHMARKS = {
+    "conway": bench_conway,
+    "dual_snake": bench_snake,
+    "cannon": bench_cannon,
+}
+
+
+def run(games=tuple(BENCHMARKS), min_seconds=MIN_SECONDS):
+    """Run the selected benchmarks headless and return a JSON-ready report."""
+    use_dummy_display()
+    import pygame
+
+    results = []
+    for game in games:
+        results.extend(BENCHMARKS[game](min_seconds=min_seconds))
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "min_seconds": min_seconds,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON report")
+    parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS, help="minimum run time per benchmark")
+    args = parser.parse_args()
+
+    report = run(args.games, args.min_seconds)
+    for entry in report["results"]:
+        params = " ".join(f"{key}={value}" for key, value in entry["params"].items())
+        print(f"{entry['name']:24} {params:32} {entry['rate']:12.1f} {entry['unit']}")
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
+    sys.exit()
@@ -2,9 +2,13 @@ import pygame
 import math
 import sys
 import random
+from functools import lru_cache
 
-# Initialize Pygame
-pygame.init()
+import numpy as np
+
+import replay
+from capture import CAPTURE_FPS, FrameCapture
+from profiler import PROFILER, OVERLAY_KEY
 
 # Screen dimensions and colors
 WIDTH, HEIGHT = 800, 600
@@ -15,70 +19,172 @@ CANNON_COLOR_1 = (105, 105, 105)   # Left cannon color
 CANNON_COLOR_2 = (70, 130, 180)    # Right cannon color
 PROJECTILE_COLOR = (255, 69, 0)
 
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Two-Player Cannon Artillery")
-
-clock = pygame.time.Clock()
-font = pygame.font.SysFont(None, 24)
-big_font = pygame.font.SysFont(None, 48)
-
 # Physics
 gravity = 0.5
+# Velocities and gravity are tuned per 1/60 s step, so physics always runs at
+# that rate however fast frames are rendered
+PHYSICS_DT = 1 / 60
+MAX_FRAME_TIME = 0.25  # Longer frames (e.g. a stall) are clamped so physics can catch up
 
 # Terrain generation parameters
 TERRAIN_STEP = 1  # pixel step for terrain array
 MIN_HEIGHT = HEIGHT - 200
 MAX_HEIGHT = HEIGHT - 50
+CRATER_RADIUS = 25  # Ground removed around a shell that hits the terrain
+
+# Aiming: the arrow keys step the angle and power, clamped to each side's limits
+START_ANGLES = (45, 135)  # Left cannon fires right, right cannon fires left
+ANGLE_LIMITS = ((0, 90), (90, 180))
+ANGLE_STEP = 2
+START_POWER = 50
+POWER_LIMITS = (10, 100)
+POWER_STEP = 2
+
+# Computer player
+AI_PLAYERS = set()  # Players (0 or 1) the computer aims for; C toggles player 2
+AI_THINK_TIME = 0.5  # Seconds the computer waits before firing
+MAX_SHOT_STEPS = 1000  # Physics steps before the solver gives up on a shot
+PREVIEW_STEPS = 20  # Length of the aim-preview arc (P toggles it)
+
+# Weapons
+WEAPONS = ["shell", "triple", "shrapnel"]  # W cycles the current player's weapon
+TRIPLE_SPREAD = 4  # Degrees between the shells of a triple shot
+SHRAPNEL_FRAGMENTS = 60  # Fragments thrown up where a shrapnel shell lands
+SHRAPNEL_SPEED = (3, 9)
+DEBRIS_PER_CRATER = 24
+SMOKE_PER_BLAST = 16
+
+# Particles: kinds, and per-kind tables indexed by them
+MAX_PARTICLES = 8192  # Preallocated slots; spawns beyond this are dropped
+SHELL, FRAGMENT, DEBRIS, SMOKE = 0, 1, 2, 3
+PARTICLE_GRAVITY = np.array([1.0, 1.0, 1.0, -0.05])  # Multiples of gravity; smoke rises
+PARTICLE_DRAG = np.array([1.0, 1.0, 0.99, 0.95])  # Share of velocity kept each step
+PARTICLE_LIFE = np.array([np.inf, 300, 120, 90])  # Steps before a particle expires
+PARTICLE_SOLID = np.array([True, True, True, False])  # Stopped by the ground
+PARTICLE_DAMAGES = np.array([True, True, False, False])  # Hits cannons and digs craters
+PARTICLE_CRATER = [CRATER_RADIUS, 6, 0, 0]
+PARTICLE_COLORS = [PROJECTILE_COLOR, (255, 140, 0), (110, 80, 40), (150, 150, 150)]
+PARTICLE_SIZES = [5, 2, 2, 3]  # Shell radius; side of the square drawn for the rest
 
-def generate_terrain():
+# --- Destructible Terrain ---
+class Terrain:
+    """Destructible ground stored as a pixel mask, so craters can undercut it.
+
+    `solid[x, y]` is True for ground pixels (indexed like pygame.surfarray),
+    which makes collision lookups O(1). `heights[x]` caches the top solid
+    pixel of every column (HEIGHT if the column is empty) and is what
+    `terrain[x]` returns, so code written for a plain heightmap still works.
+    """
+
+    def __init__(self, heights):
+        self.heights = np.asarray(heights, dtype=np.int32)
+        self.version = 0  # Bumped on every change, for caches keyed on the terrain
+        rows = np.arange(HEIGHT)
+        self.solid = rows[None, :] >= self.heights[:, None]
+        # Plain-list copy of heights: indexing it is much cheaper than a NumPy scalar
+        self.tops = self.heights.tolist()
+
+    def __getitem__(self, x):
+        return self.tops[x]
+
+    def __len__(self):
+        return WIDTH
+
+    def is_solid(self, x, y):
+        """True if pixel (x, y) is ground; everything below the screen counts as ground."""
+        if y >= HEIGHT:
+            return True
+        # Anything above the column's top pixel is sky, which is the common case
+        if y < self.tops[x]:
+            return False
+        return bool(self.solid[x, y])
+
+    def carve(self, cx, cy, radius):
+        """Remove a circle of ground and return the pygame.Rect it touched (or None).
+
+        Only the crater's bounding box is masked and only its columns have
+        their heights recomputed, so the cost grows with the crater, not
+        with the screen width.
+        """
+        area = pygame.Rect(int(cx) - radius, int(cy) - radius, 2 * radius + 1, 2 * radius + 1)
+        area = area.clip(pygame.Rect(0, 0, WIDTH, HEIGHT))
+        if not area.width or not area.height:
+            return None
+        xs, ys = np.ogrid[area.left:area.right, area.top:area.bottom]
+        inside = (xs - cx) ** 2 + (ys - cy) ** 2 <= radius * radius
+        self.solid[area.left:area.right, area.top:area.bottom] &= ~inside
+
+        columns = self.solid[area.left:area.right]
+        self.heights[area.left:area.right] = np.where(columns.any(axis=1), columns.argmax(axis=1), HEIGHT)
+        self.tops[area.left:area.right] = self.heights[area.left:area.right].tolist()
+        self.version += 1
+        return area
+
+def generate_terrain(rng=random):
     terrain = []
     # Start with a base height in the middle of our allowed range.
     height = (MIN_HEIGHT + MAX_HEIGHT) // 2
     for x in range(WIDTH):
         # Vary the height with a small random step
-        height += random.randint(-1, 1)
+        height += rng.randint(-1, 1)
         # Clamp the height
         height = max(MIN_HEIGHT, min(MAX_HEIGHT, height))
         terrain.append(height)
-    return terrain
-
-terrain = generate_terrain()
+    return Terrain(terrain)
 
-def draw_terrain(terrain):
-    # Create a polygon for the terrain
-    points = [(0, HEIGHT)]
-    for x in range(WIDTH):
-        points.append((x, terrain[x]))
-    points.append((WIDTH - 1, HEIGHT))
-    pygame.draw.polygon(screen, GROUND_COLOR, points)
+def draw_terrain(surface, terrain, area=None):
+    """Paint the sky and ground pixels of `area` (default: everything) from the terrain mask."""
+    area = area or surface.get_rect()
+    pixels = pygame.surfarray.pixels3d(surface)
+    mask = terrain.solid[area.left:area.right, area.top:area.bottom, None]
+    pixels[area.left:area.right, area.top:area.bottom] = np.where(mask, GROUND_COLOR, WHITE)
 
 class Cannon:
-    def __init__(self, x, color):
+    def __init__(self, x, color, terrain):
+        self.terrain = terrain
         self.x = x
         self.y = terrain[int(x)]
         self.color = color
-        self.angle = 45 if x < WIDTH // 2 else 135  # left cannon fires right, right cannon fires left
-        self.power = 50
+        self.angle = START_ANGLES[0] if x < WIDTH // 2 else START_ANGLES[1]
+        self.power = START_POWER
         self.length = 40
         self.radius = 15  # for drawing and collision
+        self.weapon = WEAPONS[0]
+        self._sprite = None
+        self._sprite_angle = None
     
     def update_position(self):
         # Cannon sits on the terrain
-        self.y = terrain[int(self.x)]
+        self.y = self.terrain[int(self.x)]
+
+    def sprite(self):
+        """Return the cannon drawn around the center of a transparent surface.
+
+        The sprite is cached and only redrawn when the angle changes.
+        """
+        if self._sprite_angle != self.angle:
+            half = self.length + 8
+            self._sprite = pygame.Surface((2 * half, 2 * half), pygame.SRCALPHA)
+            # Calculate barrel end point
+            rad_angle = math.radians(self.angle)
+            end_x = half + self.length * math.cos(rad_angle)
+            end_y = half - self.length * math.sin(rad_angle)
+            pygame.draw.line(self._sprite, self.color, (half, half), (end_x, end_y), 8)
+            # Draw the base of the cannon
+            pygame.draw.circle(self._sprite, self.color, (half, half), self.radius)
+            self._sprite_angle = self.angle
+        return self._sprite
+
+    def rect(self):
+        """Screen area covered by the cannon sprite."""
+        return self.sprite().get_rect(center=(int(self.x), int(self.y)))
     
-    def draw(self):
-        self.update_position()
-        # Calculate barrel end point
-        rad_angle = math.radians(self.angle)
-        end_x = self.x + self.length * math.cos(rad_angle)
-        end_y = self.y - self.length * math.sin(rad_angle)
-        pygame.draw.line(screen, self.color, (self.x, self.y), (end_x, end_y), 8)
-        # Draw the base of the cannon
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
+    def draw(self, surface):
+        surface.blit(self.sprite(), self.rect())
     
-    def fire(self):
+    def fire(self, angle=None):
         # Start the projectile at the tip of the barrel
-        rad_angle = math.radians(self.angle)
+        rad_angle = math.radians(self.angle if angle is None else angle)
         start_x = self.x + self.length * math.cos(rad_angle)
         start_y = self.y - self.length * math.sin(rad_angle)
         # Velocity components (adjust factor to moderate speed)
@@ -86,125 +192,671 @@ class Cannon:
         vel_y = -self.power * math.sin(rad_angle) / 2.0
         return [start_x, start_y], [vel_x, vel_y]
 
-# Create two cannons
-cannon_left = Cannon(50, CANNON_COLOR_1)
-cannon_right = Cannon(WIDTH - 50, CANNON_COLOR_2)
-cannons = [cannon_left, cannon_right]
-
-# Game state variables
-current_player = 0  # 0 for left cannon, 1 for right cannon
-projectile_active = False
-projectile_pos = [0, 0]
-projectile_vel = [0, 0]
-game_over = False
-winner = None
-
-def update_projectile(pos, vel):
-    # Update projectile position and velocity
-    pos[0] += vel[0]
-    pos[1] += vel[1]
-    vel[1] += gravity  # gravity effect
-    return pos, vel
-
-def check_collision_with_terrain(pos):
-    x = int(pos[0])
-    if 0 <= x < WIDTH:
-        if pos[1] >= terrain[x]:
-            return True
-    return False
+# --- Trajectory Solver and AI ---
+FLYING, HIT, GROUND, OFFSCREEN = 0, 1, 2, 3
+
+def adjust(value, step, limits):
+    """Move an aim setting by `step` and clamp it, as one arrow-key press does."""
+    low, high = limits
+    return max(low, min(value + step, high))
+
+def reachable(start, step, limits):
+    """Return every value repeated presses of +-`step` can reach from `start`, sorted."""
+    seen, todo = {start}, [start]
+    while todo:
+        value = todo.pop()
+        for nxt in (adjust(value, step, limits), adjust(value, -step, limits)):
+            if nxt not in seen:
+                seen.add(nxt)
+                todo.append(nxt)
+    return np.array(sorted(seen))
+
+def legal_shots(player):
+    """Every angle and power the KEYDOWN handler lets `player` reach from the starting aim.
+
+    Presses move in steps of 2, so from the starting 45 or 135 the angle is
+    odd until a press is clamped at an end of the range (1 -> 0, 89 -> 90),
+    and even from then on. Between the two, every whole angle can be
+    reached; power is always even.
+    """
+    angles = reachable(START_ANGLES[player], ANGLE_STEP, ANGLE_LIMITS[player])
+    powers = reachable(START_POWER, POWER_STEP, POWER_LIMITS)
+    return angles, powers
+
+def sweep_cannon_batch(start, end, cannon):
+    """Return how far along each of (n, 2) arrays of segments it enters the cannon's circle.
+
+    Values are fractions of the segment: 0 if it starts inside, np.inf where it misses.
+    """
+    d = end - start
+    f = start - (cannon.x, cannon.y)
+    a = (d * d).sum(axis=1)
+    c = (f * f).sum(axis=1) - cannon.radius ** 2
+    b = 2 * (f * d).sum(axis=1)
+    disc = b * b - 4 * a * c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (-b - np.sqrt(disc)) / (2 * a)
+    t_hit = np.where((disc >= 0) & (a > 0) & (t >= 0) & (t <= 1), t, np.inf)
+    t_hit[c <= 0] = 0.0
+    return t_hit
+
+def sweep_terrain_batch(start, end, terrain):
+    """Return how far along each of (n, 2) arrays of segments it first crosses solid ground.
+
+    Values are fractions of the segment, np.inf where it stays in the sky.
+
+    Segments are sampled at most one pixel apart so thin spikes can't be
+    skipped; everything below the screen counts as ground.
+    """
+    t_ground = np.full(len(start), np.inf)
+    # Only segments low enough to reach the highest column top can touch ground
+    low = np.nonzero(np.maximum(start[:, 1], end[:, 1]) >= terrain.heights.min())[0]
+    if not len(low):
+        return t_ground
+    d = end[low] - start[low]
+    steps = np.maximum(1, np.ceil(np.abs(d).max(axis=1))).astype(int)
+    i = np.arange(1, steps.max() + 1)
+    frac = i[None, :] / steps[:, None]
+    xs = (start[low, 0, None] + d[:, 0, None] * frac).astype(int)
+    ys = (start[low, 1, None] + d[:, 1, None] * frac).astype(int)
+    inside = (xs >= 0) & (xs < WIDTH)
+    solid = terrain.solid[np.clip(xs, 0, WIDTH - 1), np.clip(ys, 0, HEIGHT - 1)]
+    solid = inside & ((ys >= HEIGHT) | ((ys >= 0) & solid)) & (i[None, :] <= steps[:, None])
+    first = solid.argmax(axis=1)
+    struck = solid[np.arange(len(low)), first]
+    t_ground[low[struck]] = frac[struck, first[struck]]
+    return t_ground
+
+def integrate_shots(shooter, opponent, angles, powers, max_steps=MAX_SHOT_STEPS, record=False):
+    """Fly many shells at once with the same physics and swept tests as ParticleSystem.step.
+
+    `angles` and `powers` are equal-length arrays, one entry per shot.
+    Returns (outcomes, impacts, path): an outcome code per shot (FLYING,
+    HIT, GROUND or OFFSCREEN), where each shot ended, and if `record` is
+    set, every shot's position after each step (NaN once it has ended).
+    """
+    rad = np.radians(np.asarray(angles, dtype=float))
+    powers = np.asarray(powers, dtype=float)
+    pos = np.stack([shooter.x + shooter.length * np.cos(rad), shooter.y - shooter.length * np.sin(rad)], axis=1)
+    vel = np.stack([powers * np.cos(rad) / 2.0, -powers * np.sin(rad) / 2.0], axis=1)
+    outcomes = np.zeros(len(rad), dtype=np.int8)
+    active = np.arange(len(rad))
+    path = [] if record else None
+
+    for _ in range(max_steps):
+        if not len(active):
+            break
+        start = pos[active]
+        end = start + vel[active]
+        vel[active, 1] += gravity
+        d = end - start
+        t_hit = sweep_cannon_batch(start, end, opponent)
+        t_ground = sweep_terrain_batch(start, end, shooter.terrain)
+        t_end = np.minimum(t_hit, t_ground)
+        ended = np.isfinite(t_end)
+        impact = start + d * np.where(ended, t_end, 1.0)[:, None]
+        pos[active] = impact
+        code = np.where(t_hit < t_ground, HIT, GROUND)
+        offscreen = ~ended & ((impact[:, 0] < 0) | (impact[:, 0] > WIDTH) | (impact[:, 1] > HEIGHT))
+        outcomes[active[ended]] = code[ended]
+        outcomes[active[offscreen]] = OFFSCREEN
+
+        if record:
+            frame = np.full(pos.shape, np.nan)
+            frame[active] = impact
+            path.append(frame)
+        active = active[~(ended | offscreen)]
+
+    return outcomes, pos, (np.array(path) if record else None)
+
+@lru_cache(maxsize=32)
+def _solve(shooter, opponent, player, terrain_version, shooter_pos, opponent_pos):
+    # The versions and positions are only part of the cache key; the cannons are read directly
+    angles, powers = legal_shots(player)
+    grid_angles, grid_powers = np.meshgrid(angles, powers, indexing="ij")
+    outcomes, impacts, _ = integrate_shots(shooter, opponent, grid_angles.ravel(), grid_powers.ravel())
+    return grid_angles.ravel(), grid_powers.ravel(), outcomes, impacts
+
+def solve_shots(cannons, player):
+    """Return (angles, powers, outcomes, impacts) for every legal shot of `player`.
+
+    Tables are memoized on the terrain version and both cannon positions,
+    so turns that don't change anything reuse the solved table.
+    """
+    shooter, opponent = cannons[player], cannons[1 - player]
+    return _solve(shooter, opponent, player, shooter.terrain.version,
+                  (shooter.x, shooter.y), (opponent.x, opponent.y))
+
+def choose_shot(cannons, player):
+    """Pick the (angle, power) whose shot lands closest to the opponent."""
+    angles, powers, outcomes, impacts = solve_shots(cannons, player)
+    opponent = cannons[1 - player]
+    miss = np.hypot(impacts[:, 0] - opponent.x, impacts[:, 1] - opponent.y)
+    # Any hit beats any miss; shots that never end are never chosen
+    score = np.where(outcomes == HIT, miss - 1e6, np.where(outcomes == FLYING, np.inf, miss))
+    best = int(np.argmin(score))
+    return int(angles[best]), int(powers[best])
+
+def aim_preview(cannon, opponent, steps=PREVIEW_STEPS):
+    """Return the first `steps` points of the current shot's arc, for drawing."""
+    _, _, path = integrate_shots(cannon, opponent, [cannon.angle], [cannon.power], max_steps=steps, record=True)
+    points = path[:, 0]
+    return [tuple(p) for p in points[~np.isnan(points[:, 0])]]
+
+# --- Particles and Weapons ---
+class ParticleSystem:
+    """Shells, fragments, debris and smoke in preallocated struct-of-arrays storage.
+
+    Every particle is a slot in a set of parallel NumPy arrays, and unused
+    slots are kept on a free-list stack, so spawning and dying never
+    allocate. step() moves every live particle and runs the swept terrain
+    and cannon tests for all of them in one vectorized pass, so its cost
+    grows with array size rather than with Python-level work per particle.
+    """
+
+    def __init__(self, capacity=MAX_PARTICLES, rng=None):
+        self.capacity = capacity
+        self.rng = rng or np.random.default_rng()
+        self.pos = np.zeros((capacity, 2))
+        self.prev = np.zeros((capacity, 2))  # Position before the last step, for interpolation
+        self.vel = np.zeros((capacity, 2))
+        self.life = np.zeros(capacity)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.split = np.zeros(capacity, dtype=bool)  # Bursts into shrapnel when it lands
+        self.alive = np.zeros(capacity, dtype=bool)
+        # Free slots form a stack; the top is free[free_count - 1]
+        self.free = np.arange(capacity)[::-1].copy()
+        self.free_count = capacity
+
+    FIELDS = ("pos", "prev", "vel", "life", "kind", "split", "alive", "free")
+
+    def __len__(self):
+        return self.capacity - self.free_count
+
+    def snapshot(self):
+        state = {name: getattr(self, name).copy() for name in self.FIELDS}
+        state["free_count"] = self.free_count
+        state["rng"] = self.rng.bit_generator.state
+        return state
+
+    def restore(self, state):
+        for name in self.FIELDS:
+            getattr(self, name)[:] = state[name]
+        self.free_count = state["free_count"]
+        self.rng.bit_generator.state = state["rng"]
+
+    def clear(self):
+        self.alive[:] = False
+        self.free[:] = np.arange(self.capacity)[::-1]
+        self.free_count = self.capacity
 
-def check_collision_with_cannon(pos, cannon):
-    # Simple collision: if projectile is within cannon's radius
-    dx = pos[0] - cannon.x
-    dy = pos[1] - cannon.y
-    distance = math.hypot(dx, dy)
-    return distance <= cannon.radius
+    def spawn(self, pos, vel, kind, split=False):
+        """Add particles of one kind from (n, 2) position and velocity arrays."""
+        pos = np.atleast_2d(pos)
+        n = min(len(pos), self.free_count)
+        self.free_count -= n
+        slots = self.free[self.free_count:self.free_count + n]
+        self.pos[slots] = pos[:n]
+        self.prev[slots] = pos[:n]
+        self.vel[slots] = np.atleast_2d(vel)[:n]
+        self.life[slots] = PARTICLE_LIFE[kind]
+        self.kind[slots] = kind
+        self.split[slots] = split
+        self.alive[slots] = True
 
-def draw_turn_info():
+    def burst(self, x, y, kind, count, speed):
+        """Throw `count` particles upward from (x, y) at random angles and speeds."""
+        angle = self.rng.uniform(0, math.pi, count)
+        v = self.rng.uniform(*speed, count)
+        vel = np.stack([v * np.cos(angle), -v * np.sin(angle)], axis=1)
+        self.spawn(np.tile((x, y), (count, 1)), vel, kind)
+
+    def damaging(self):
+        """Number of live particles that can still hit a cannon or dig a crater."""
+        return int(np.count_nonzero(self.alive & PARTICLE_DAMAGES[self.kind]))
+
+    def step(self, terrain, cannons, shooter=None):
+        """Advance every live particle one physics step.
+
+        Returns (kind, outcome, target, x, y, split) for each shell or
+        fragment that ended this step, where outcome is HIT (target is the
+        index of the cannon struck), GROUND or OFFSCREEN. Debris and smoke
+        just disappear. Shells pass through cannons[shooter], the one that
+        fired them, as the solver assumes; fragments can hit either cannon.
+        """
+        idx = np.nonzero(self.alive)[0]
+        if not len(idx):
+            return []
+        kind = self.kind[idx]
+        start = self.pos[idx]
+        vel = self.vel[idx]
+        end = start + vel
+        vel[:, 1] += gravity * PARTICLE_GRAVITY[kind]
+        self.vel[idx] = vel * PARTICLE_DRAG[kind][:, None]
+        self.prev[idx] = start
+        self.life[idx] -= 1
+
+        # Each swept test runs once over every particle it applies to
+        t_end = np.full(len(idx), np.inf)
+        target = np.full(len(idx), -1)
+        solid = np.nonzero(PARTICLE_SOLID[kind])[0]
+        t_end[solid] = sweep_terrain_batch(start[solid], end[solid], terrain)
+        damaging = np.nonzero(PARTICLE_DAMAGES[kind])[0]
+        for i, cannon in enumerate(cannons):
+            hits = damaging[kind[damaging] != SHELL] if i == shooter else damaging
+            t = sweep_cannon_batch(start[hits], end[hits], cannon)
+            closer = t < t_end[hits]
+            t_end[hits[closer]] = t[closer]
+            target[hits[closer]] = i
+
+        ended = np.isfinite(t_end)
+        impact = start + (end - start) * np.where(ended, t_end, 1.0)[:, None]
+        self.pos[idx] = impact
+        x, y = impact[:, 0], impact[:, 1]
+        offscreen = ~ended & ((x < 0) | (x > WIDTH) | (y > HEIGHT))
+        dead = ended | offscreen | (self.life[idx] <= 0)
+
+        report = np.nonzero((ended | offscreen) & PARTICLE_DAMAGES[kind])[0]
+        outcome = np.where(offscreen, OFFSCREEN, np.where(target >= 0, HIT, GROUND))
+        events = list(zip(kind[report].tolist(), outcome[report].tolist(), target[report].tolist(),
+                          x[report].tolist(), y[report].tolist(), self.split[idx[report]].tolist()))
+
+        # Push the dead slots back onto the free stack
+        gone = idx[dead]
+        self.alive[gone] = False
+        self.free[self.free_count:self.free_count + len(gone)] = gone
+        self.free_count += len(gone)
+        return events
+
+def fire_weapon(cannon, particles):
+    """Spawn the shells for one shot of the cannon's current weapon."""
+    if cannon.weapon == "triple":
+        shots = [cannon.fire(cannon.angle + spread) for spread in (-TRIPLE_SPREAD, 0, TRIPLE_SPREAD)]
+        particles.spawn([pos for pos, _ in shots], [vel for _, vel in shots], SHELL)
+    else:
+        pos, vel = cannon.fire()
+        particles.spawn(pos, vel, SHELL, split=cannon.weapon == "shrapnel")
+
+def detonate(particles, terrain, kind, x, y, split, outcome):
+    """Blow up a shell or fragment that ended at (x, y); return the crater's rect, if any."""
+    crater = None
+    if outcome == GROUND:
+        crater = terrain.carve(x, y, PARTICLE_CRATER[kind])
+        if split:
+            particles.burst(x, y, FRAGMENT, SHRAPNEL_FRAGMENTS, SHRAPNEL_SPEED)
+    if kind == SHELL:
+        if crater:
+            particles.burst(x, y, DEBRIS, DEBRIS_PER_CRATER, (2, 6))
+        particles.burst(x, y, SMOKE, SMOKE_PER_BLAST, (0.5, 2))
+    return crater
+
+@lru_cache(maxsize=None)
+def get_font(size):
+    """Load the default font at `size` the first time it is needed."""
+    pygame.font.init()
+    return pygame.font.SysFont(None, size)
+
+def render_turn_info(cannons, current_player):
+    """Return the HUD text surfaces and where they go."""
+    font = get_font(24)
     info = f"Player {current_player + 1}'s turn"
     text = font.render(info, True, BLACK)
-    screen.blit(text, (10, 10))
     # Also display current cannon's angle and power
     cannon = cannons[current_player]
-    params = f"Angle: {cannon.angle}°  Power: {cannon.power}"
+    params = f"Angle: {cannon.angle}°  Power: {cannon.power}  Weapon: {cannon.weapon}"
     text2 = font.render(params, True, BLACK)
-    screen.blit(text2, (10, 30))
+    return [(text, (10, 10)), (text2, (10, 30))]
+
+# --- Layered Renderer ---
+class Renderer:
+    """Draw the game in layers so that a frame only touches what changed.
+
+    The background and terrain are drawn once into a terrain layer (again
+    only after invalidate_terrain()). Cannon sprites are composited over it
+    into a cached scene, and only their area is redone when one turns or
+    moves. The HUD and particles are drawn on top each frame, and last
+    frame's copies are erased by restoring those rects from the scene.
+    render() returns the rects to pass to pygame.display.update().
+    """
+
+    def __init__(self, surface, terrain):
+        self.surface = surface
+        self.terrain = terrain
+        self.terrain_layer = pygame.Surface((WIDTH, HEIGHT))
+        self.scene = pygame.Surface((WIDTH, HEIGHT))
+        self.terrain_dirty = True
+        self.terrain_areas = []
+        self.cannon_state = []
+        self.cannon_rects = []
+        self.overlay_rects = []
+        self.hud_key = None
+        self.hud = []
+
+    def invalidate_terrain(self, area=None):
+        """Redraw all of the terrain on the next frame, or just `area` of it."""
+        if area is None:
+            self.terrain_dirty = True
+        else:
+            self.terrain_areas.append(area)
+
+    def _draw_scene(self, cannons):
+        draw_terrain(self.terrain_layer, self.terrain)
+        self.scene.blit(self.terrain_layer, (0, 0))
+        for cannon in cannons:
+            cannon.draw(self.scene)
+        self.surface.blit(self.scene, (0, 0))
+        self.terrain_dirty = False
+        self.terrain_areas = []
+        self.overlay_rects = []
+        return [self.surface.get_rect()]
+
+    def _redraw_area(self, area, cannons):
+        # Restore the terrain in area, then redraw every cannon that overlaps it
+        self.scene.blit(self.terrain_layer, area, area)
+        self.scene.set_clip(area)
+        for cannon in cannons:
+            cannon.draw(self.scene)
+        self.scene.set_clip(None)
+        self.surface.blit(self.scene, area, area)
+
+    def _update_cannons(self, cannons):
+        rects = []
+        for area in self.terrain_areas:
+            draw_terrain(self.terrain_layer, self.terrain, area)
+            self._redraw_area(area, cannons)
+            rects.append(area)
+        self.terrain_areas = []
+        for i, cannon in enumerate(cannons):
+            if self.cannon_state[i] == (cannon.angle, cannon.x, cannon.y):
+                continue
+            area = self.cannon_rects[i].union(cannon.rect())
+            self._redraw_area(area, cannons)
+            rects.append(area)
+        return rects
+
+    def _draw_particles(self, particles, alpha):
+        """Draw live particles between their last two positions; return the rects touched."""
+        idx = np.nonzero(particles.alive)[0]
+        if not len(idx):
+            return []
+        prev = particles.prev[idx]
+        pos = (prev + (particles.pos[idx] - prev) * alpha).astype(int)
+        kind = particles.kind[idx]
+        rects = []
+        for x, y in pos[kind == SHELL].tolist():
+            rects.append(pygame.draw.circle(self.surface, PARTICLE_COLORS[SHELL], (x, y), PARTICLE_SIZES[SHELL]))
+
+        # Everything else is a small square written straight into the pixel array
+        pixels = pygame.surfarray.pixels3d(self.surface)
+        for k in (SMOKE, DEBRIS, FRAGMENT):
+            size = PARTICLE_SIZES[k]
+            xs, ys = pos[kind == k].T
+            keep = (xs >= 0) & (xs <= WIDTH - size) & (ys >= 0) & (ys <= HEIGHT - size)
+            xs, ys = xs[keep], ys[keep]
+            if not len(xs):
+                continue
+            for dx in range(size):
+                for dy in range(size):
+                    pixels[xs + dx, ys + dy] = PARTICLE_COLORS[k]
+            left, top = xs.min(), ys.min()
+            rects.append(pygame.Rect(left, top, xs.max() - left + size, ys.max() - top + size))
+        del pixels
+        return rects
+
+    def render(self, cannons, current_player, particles=None, alpha=1.0, show_hud=True, preview=None):
+        if self.terrain_dirty:
+            rects = self._draw_scene(cannons)
+        else:
+            rects = self._update_cannons(cannons)
+            for rect in self.overlay_rects:
+                self.surface.blit(self.scene, rect, rect)
+            rects.extend(self.overlay_rects)
+        self.cannon_state = [(cannon.angle, cannon.x, cannon.y) for cannon in cannons]
+        self.cannon_rects = [cannon.rect() for cannon in cannons]
+
+        overlay = []
+        if show_hud:
+            cannon = cannons[current_player]
+            key = (current_player, cannon.angle, cannon.power, cannon.weapon)
+            if key != self.hud_key:
+                self.hud = render_turn_info(cannons, current_player)
+                self.hud_key = key
+            for text, pos in self.hud:
+                overlay.append(self.surface.blit(text, pos))
+        if preview and len(preview) > 1:
+            overlay.append(pygame.draw.lines(self.surface, PROJECTILE_COLOR, False, preview))
+        if particles is not None:
+            overlay.extend(self._draw_particles(particles, alpha))
+        self.overlay_rects = overlay
+        return rects + overlay
+
+# --- Game ---
+class CannonGame:
+    """One match, advanced in fixed physics steps with no drawing or window.
+
+    step() runs exactly one PHYSICS_DT step, so the simulation can be
+    driven headless at any speed; main() runs it in real time. render()
+    draws the current state onto any surface.
+    """
 
-def show_winner(winner):
-    text = big_font.render(f"Player {winner + 1} Wins!", True, BLACK)
+    def __init__(self, seed=None, ai_players=AI_PLAYERS):
+        self.ai_players = set(ai_players)
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.rng = random.Random(seed)
+        self.terrain = generate_terrain(self.rng)
+        self.cannons = [
+            Cannon(50, CANNON_COLOR_1, self.terrain),
+            Cannon(WIDTH - 50, CANNON_COLOR_2, self.terrain),
+        ]
+        self.particles = ParticleSystem(rng=np.random.default_rng(seed))
+        self.current_player = 0  # 0 for left cannon, 1 for right cannon
+        self.shot_active = False  # A shell or fragment from this turn is still flying
+        self.game_over = False
+        self.winner = None
+        self.ai_wait = 0.0
+        self.ticks = 0
+        self._craters = []  # Terrain rects changed since the last render
+        self._renderer = None
+
+    def handle_key(self, key):
+        """Apply one key press (a pygame key constant) for the current player."""
+        if key == pygame.K_c:
+            self.ai_players ^= {1}
+            return
+        if self.game_over or self.current_player in self.ai_players:
+            return
+        cannon = self.cannons[self.current_player]
+        # Adjust cannon parameters (controls vary by current player's side)
+        # Angle limits depend on the side; legal_shots() follows the same rules
+        if key == pygame.K_UP:
+            cannon.angle = adjust(cannon.angle, ANGLE_STEP, ANGLE_LIMITS[self.current_player])
+        elif key == pygame.K_DOWN:
+            cannon.angle = adjust(cannon.angle, -ANGLE_STEP, ANGLE_LIMITS[self.current_player])
+        elif key == pygame.K_RIGHT:
+            cannon.power = adjust(cannon.power, POWER_STEP, POWER_LIMITS)
+        elif key == pygame.K_LEFT:
+            cannon.power = adjust(cannon.power, -POWER_STEP, POWER_LIMITS)
+        elif key == pygame.K_w and not self.shot_active:
+            cannon.weapon = WEAPONS[(WEAPONS.index(cannon.weapon) + 1) % len(WEAPONS)]
+        elif key == pygame.K_SPACE and not self.shot_active:
+            # Fire current player's weapon
+            fire_weapon(cannon, self.particles)
+            self.shot_active = True
+
+    def step(self, inputs=()):
+        """Apply the key presses in `inputs`, then advance one physics step."""
+        for key in inputs:
+            self.handle_key(key)
+        self.ticks += 1
+
+        # The computer aims and fires once it has "thought" for a moment
+        if self.current_player in self.ai_players and not self.shot_active and not self.game_over:
+            self.ai_wait += PHYSICS_DT
+            if self.ai_wait >= AI_THINK_TIME:
+                cannon = self.cannons[self.current_player]
+                with PROFILER.scope("aim"):
+                    cannon.angle, cannon.power = choose_shot(self.cannons, self.current_player)
+                fire_weapon(cannon, self.particles)
+                self.shot_active = True
+                self.ai_wait = 0.0
+
+        with PROFILER.scope("particles"):
+            events = self.particles.step(self.terrain, self.cannons, self.current_player)
+        for kind, outcome, target, x, y, split in events:
+            if outcome == HIT and not self.game_over:
+                # Whoever's cannon is struck loses, even by their own shrapnel
+                self.game_over = True
+                self.winner = 1 - target
+            if outcome != OFFSCREEN:
+                crater = detonate(self.particles, self.terrain, kind, x, y, split, outcome)
+                if crater:
+                    self._craters.append(crater)
+                    # Cannons drop onto whatever ground is left under them
+                    for cannon in self.cannons:
+                        cannon.update_position()
+        if self.shot_active and not self.game_over and not self.particles.damaging():
+            # Everything from this shot has landed, so switch turns
+            self.shot_active = False
+            self.current_player = 1 - self.current_player
+
+    def snapshot(self):
+        """Return the whole match as plain data, with the terrain mask packed to bits."""
+        return {
+            "rng": self.rng.getstate(),
+            "heights": self.terrain.heights.copy(),
+            "solid": np.packbits(self.terrain.solid),
+            "terrain_version": self.terrain.version,
+            "cannons": [(c.x, c.y, c.angle, c.power, c.weapon) for c in self.cannons],
+            "particles": self.particles.snapshot(),
+            "current_player": self.current_player,
+            "shot_active": self.shot_active,
+            "game_over": self.game_over,
+            "winner": self.winner,
+            "ai_wait": self.ai_wait,
+            "ai_players": sorted(self.ai_players),
+            "ticks": self.ticks,
+        }
+
+    def restore(self, state):
+        self.rng.setstate(state["rng"])
+        # Fresh terrain and cannon objects, so solver tables cached for the old ones can't be reused
+        self.terrain = Terrain(state["heights"])
+        self.terrain.solid[:] = np.unpackbits(state["solid"], count=WIDTH * HEIGHT).reshape(WIDTH, HEIGHT)
+        self.terrain.version = state["terrain_version"]
+        colors = (CANNON_COLOR_1, CANNON_COLOR_2)
+        self.cannons = []
+        for color, (x, y, angle, power, weapon) in zip(colors, state["cannons"]):
+            cannon = Cannon(x, color, self.terrain)
+            cannon.y, cannon.angle, cannon.power, cannon.weapon = y, angle, power, weapon
+            self.cannons.append(cannon)
+        self.particles.restore(state["particles"])
+        for name in ("current_player", "shot_active", "game_over", "winner", "ai_wait", "ticks"):
+            setattr(self, name, state[name])
+        self.ai_players = set(state["ai_players"])
+        self._craters = []
+        self._renderer = None
+
+    def render(self, surface, alpha=1.0, show_preview=False):
+        """Draw the game onto `surface`; return the rects that changed.
+
+        `alpha` is how far into the next physics step to draw particles.
+        """
+        if self._renderer is None or self._renderer.surface is not surface:
+            self._renderer = Renderer(surface, self.terrain)
+            self._craters = []
+        for crater in self._craters:
+            self._renderer.invalidate_terrain(crater)
+        self._craters = []
+
+        player = self.current_player
+        preview = None
+        if show_preview and not self.shot_active and not self.game_over and player not in self.ai_players:
+            preview = aim_preview(self.cannons[player], self.cannons[1 - player])
+        # Draw turn info only while the game is on
+        return self._renderer.render(self.cannons, player, self.particles, alpha,
+                                     show_hud=not self.game_over, preview=preview)
+
+def show_winner(screen, winner):
+    text = get_font(48).render(f"Player {winner + 1} Wins!", True, BLACK)
     text_rect = text.get_rect(center=(WIDTH//2, HEIGHT//2))
     screen.blit(text, text_rect)
     pygame.display.flip()
     pygame.time.wait(3000)
 
-while True:
-    screen.fill(WHITE)
-    draw_terrain(terrain)
-    
-    # Draw both cannons
-    for cannon in cannons:
-        cannon.draw()
-    
-    # Draw turn info (if game is not over)
-    if not game_over:
-        draw_turn_info()
-    
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-        
-        if not game_over and event.type == pygame.KEYDOWN:
-            cannon = cannons[current_player]
-            # Adjust cannon parameters (controls vary by current player's side)
-            if event.key == pygame.K_UP:
-                # Increase angle (cap angle based on side)
-                if current_player == 0:
-                    cannon.angle = min(cannon.angle + 2, 90)
-                else:
-                    cannon.angle = min(cannon.angle + 2, 180)
-            elif event.key == pygame.K_DOWN:
-                if current_player == 0:
-                    cannon.angle = max(cannon.angle - 2, 0)
-                else:
-                    cannon.angle = max(cannon.angle - 2, 90)
-            elif event.key == pygame.K_RIGHT:
-                cannon.power = min(cannon.power + 2, 100)
-            elif event.key == pygame.K_LEFT:
-                cannon.power = max(cannon.power - 2, 10)
-            elif event.key == pygame.K_SPACE and not projectile_active:
-                # Fire projectile from current player's cannon
-                projectile_pos, projectile_vel = cannon.fire()
-                projectile_active = True
-
-    # Update and draw projectile if one is active
-    if projectile_active:
-        projectile_pos, projectile_vel = update_projectile(projectile_pos, projectile_vel)
-        pygame.draw.circle(screen, PROJECTILE_COLOR, (int(projectile_pos[0]), int(projectile_pos[1])), 5)
-        
-        # Check for collision with terrain
-        if check_collision_with_terrain(projectile_pos):
-            projectile_active = False
-            # Switch turn if no hit
-            current_player = 1 - current_player
-        
-        # Check for collision with the opponent cannon
-        opponent = cannons[1 - current_player]
-        if check_collision_with_cannon(projectile_pos, opponent):
-            projectile_active = False
-            game_over = True
-            winner = current_player
-
-        # If projectile goes off screen, end turn
-        if projectile_pos[0] < 0 or projectile_pos[0] > WIDTH or projectile_pos[1] > HEIGHT:
-            projectile_active = False
-            current_player = 1 - current_player
+def main(fps=60, max_frames=None, ai_players=AI_PLAYERS, seed=None, record=None, capture=None):
+    """Run the game. fps=0 disables the frame cap; max_frames stops after that many frames.
 
-    pygame.display.flip()
-    clock.tick(60)
-    
-    # If game over, show winner and then exit
-    if game_over:
-        show_winner(winner)
-        pygame.quit()
-        sys.exit()
+    `record` is a path to write a replay log of the session to (see replay.py).
+    `capture` is a video or PNG path to stream the frames to (see capture.py).
+    """
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Two-Player Cannon Artillery")
+    clock = pygame.time.Clock()
+
+    game = CannonGame(seed, ai_players)
+    recorder = replay.Recorder(record, "cannon", game, seed) if record else None
+    capturer = FrameCapture(capture, screen.get_size(), fps or CAPTURE_FPS) if capture else None
+    show_preview = False
+    accumulator = 0.0  # Unsimulated time carried over between frames
+    keys = []  # Key presses waiting for the next physics step
+
+    frames = 0
+    running = True
+    while running and (max_frames is None or frames < max_frames):
+        frames += 1
+        frame_time = min(clock.tick(fps) / 1000, MAX_FRAME_TIME)
+        if not fps:
+            # Uncapped (headless) runs go one physics step per frame, not by the wall clock
+            frame_time = PHYSICS_DT
+        with PROFILER.scope("events"):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+                    show_preview = not show_preview
+                elif event.type == pygame.KEYDOWN and event.key == OVERLAY_KEY:
+                    PROFILER.toggle_overlay()
+                elif event.type == pygame.KEYDOWN:
+                    keys.append(event.key)
+
+        # Advance the game in fixed physics steps for the time this frame took
+        accumulator += frame_time
+        with PROFILER.scope("simulate"):
+            while accumulator >= PHYSICS_DT:
+                accumulator -= PHYSICS_DT
+                game.step(keys)
+                if recorder:
+                    recorder.record(keys)
+                keys = []
+
+        # Draw particles between their last two physics positions
+        with PROFILER.scope("render"):
+            rects = game.render(screen, accumulator / PHYSICS_DT, show_preview)
+            if PROFILER.show_overlay:
+                panel = PROFILER.draw(screen)
+                # Erased next frame along with the HUD, so hiding the panel needs no redraw
+                game._renderer.overlay_rects.append(panel)
+                rects.append(panel)
+            pygame.display.update(rects)
+        if capturer:
+            with PROFILER.scope("capture"):
+                capturer.capture(screen)
+
+        # If game over, show winner and then exit
+        if game.game_over:
+            show_winner(screen, game.winner)
+            running = False
+
+    if recorder:
+        recorder.close()
+    if capturer:
+        capturer.close()
+    pygame.quit()
+    return frames
+
+if __name__ == "__main__":
+    main()
+    sys.exit()
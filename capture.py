@@ -0,0 +1,163 @@
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import zlib
+
+import numpy as np
+import pygame
+
+# --- Configuration ---
+CAPTURE_BUFFERS = 8  # Frames that can wait for the encoder before new ones are dropped
+CAPTURE_FPS = 30  # Video frame rate when the game runs without a frame cap
+PNG_LEVEL = 1  # zlib level for PNG frames; flat game graphics compress well even at the fastest
+# Passed to ffmpeg after the raw input; the padding keeps yuv420p happy with odd window sizes
+VIDEO_ARGS = ["-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+FFMPEG = shutil.which("ffmpeg")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+# --- PNG ---
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def write_png(path, scanlines, width, height, level=PNG_LEVEL):
+    """Write 8-bit RGB rows, each led by a filter-type byte, as a PNG file.
+
+    Everything heavy here is zlib, which releases the GIL, so frames can be
+    encoded on a thread; pygame.image.save holds it and stalls the game.
+    """
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8-bit RGB, no interlacing
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE + _png_chunk(b"IHDR", header) +
+                _png_chunk(b"IDAT", zlib.compress(scanlines, level)) + _png_chunk(b"IEND", b""))
+
+
+# --- Capture ---
+class FrameCapture:
+    """Stream frames to a PNG sequence or a video without stalling the game loop.
+
+    capture() copies a surface into one of a fixed pool of buffers and queues
+    it for an encoder thread, so a frame costs the game one copy and no
+    allocation. If every buffer is still waiting to be encoded, the frame is
+    dropped and counted in `dropped` rather than blocking; with drop=False
+    (rendering a replay, say) capture() waits for a buffer instead.
+
+    `path` is a PNG name pattern ("frames/%06d.png"; a plain .png name gets a
+    frame number added) or a video file, encoded by piping raw frames to
+    ffmpeg. Without ffmpeg, videos fall back to PNG frames beside the path.
+    """
+
+    def __init__(self, path, size, fps=CAPTURE_FPS, buffers=CAPTURE_BUFFERS, drop=True):
+        self.width, self.height = size
+        self.drop = drop
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+        self.error = None
+        self._pool = [np.empty((self.height, self.width), dtype=np.uint32) for _ in range(buffers)]
+        self._free = queue.Queue()
+        for index in range(buffers):
+            self._free.put(index)
+        self._ready = queue.Queue()  # (buffer index, RGB shifts), or None to stop
+        self._scratch = None  # 32-bit copy of surfaces with other pixel sizes
+        self.path, self._ffmpeg = self._open(path, fps)
+        self._worker = threading.Thread(target=self._encode, daemon=True)
+        self._worker.start()
+
+    def _open(self, path, fps):
+        """Return the path frames go to and the ffmpeg process, if encoding a video."""
+        root, ext = os.path.splitext(path)
+        if "%" not in path and ext.lower() != ".png":
+            if FFMPEG:
+                command = [FFMPEG, "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                           "-s", f"{self.width}x{self.height}", "-r", str(fps), "-i", "-", *VIDEO_ARGS, path]
+                return path, subprocess.Popen(command, stdin=subprocess.PIPE)
+            path = root + "_%06d.png"
+            print(f"Capture: ffmpeg not found, writing PNG frames to {path}", file=sys.stderr)
+        elif "%" not in path:
+            path = root + "_%06d" + ext
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return path, None
+
+    def capture(self, surface):
+        """Queue a copy of `surface` for encoding; return False if the frame was dropped."""
+        try:
+            index = self._free.get(block=not self.drop)
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        if surface.get_bytesize() != 4:
+            if self._scratch is None:
+                self._scratch = pygame.Surface(surface.get_size(), depth=32)
+            self._scratch.blit(surface, (0, 0))
+            surface = self._scratch
+        # surfarray is indexed (x, y); the transpose makes the copy run along rows
+        pixels = pygame.surfarray.pixels2d(surface)
+        np.copyto(self._pool[index], pixels.T)
+        del pixels  # Unlock the surface
+        self._ready.put((index, surface.get_shifts()[:3]))
+        self.captured += 1
+        return True
+
+    def _encode(self):
+        if self._ffmpeg:
+            rgb = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        else:
+            # PNG rows each start with a filter byte; 0 leaves the row as it is
+            scanlines = np.zeros((self.height, 1 + 3 * self.width), dtype=np.uint8)
+            rgb = scanlines[:, 1:].reshape(self.height, self.width, 3)
+        channel = np.empty((self.height, self.width), dtype=np.uint32)
+        while True:
+            item = self._ready.get()
+            if item is None:
+                return
+            index, shifts = item
+            pixels = self._pool[index]
+            for i, shift in enumerate(shifts):
+                # Casting to uint8 keeps the low byte, which is the channel once shifted down
+                np.right_shift(pixels, shift, out=channel)
+                np.copyto(rgb[..., i], channel, casting="unsafe")
+            self._free.put(index)  # Copied out, so the game can reuse the buffer already
+            if self.error is not None:
+                continue
+            try:
+                if self._ffmpeg:
+                    self._ffmpeg.stdin.write(rgb)
+                else:
+                    write_png(self.path % self.written, scanlines, self.width, self.height)
+                self.written += 1
+            except OSError as error:
+                # Keep draining the queue so a waiting capture() never hangs
+                self.error = error
+
+    def close(self):
+        """Encode the frames still queued, finish the video and report what was written."""
+        if self._worker is None:
+            return
+        self._ready.put(None)
+        self._worker.join()
+        self._worker = None
+        if self._ffmpeg:
+            try:
+                self._ffmpeg.stdin.close()
+            except OSError:
+                pass
+            if self._ffmpeg.wait() and self.error is None:
+                self.error = RuntimeError(f"ffmpeg exited with status {self._ffmpeg.returncode}")
+        print(f"Capture: {self.written} frames to {self.path}, {self.dropped} dropped", file=sys.stderr)
+        if self.error is not None:
+            print(f"Capture: {self.error}", file=sys.stderr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,7 +1,21 @@
 import pygame
 import sys
+import os
+import queue
+import threading
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
 import numpy as np
 
+import patterns
+import replay
+from capture import CAPTURE_FPS, FrameCapture
+from hashlife import HashLife
+from life_parallel import step_parallel
+from profiler import PROFILER, OVERLAY_KEY
+from rules import LIFE, neighbor_counts, next_states, parse_rule, step_rule
+
 # --- Configuration ---
 CELL_SIZE = 6
 GRID_WIDTH = 200
@@ -10,6 +24,20 @@ SCOREBOARD_HEIGHT = 40  # Extra space at the top for the scoreboard
 WINDOW_WIDTH = CELL_SIZE * GRID_WIDTH
 WINDOW_HEIGHT = CELL_SIZE * GRID_HEIGHT + SCOREBOARD_HEIGHT
 FPS = 10
+SIM_WORKER = None  # "thread" or "process" steps generations off the frame loop (see LifeWorker)
+GENERATIONS_PER_SECOND = FPS  # Worker's target generation rate, independent of FPS; 0 runs flat out
+STEP_ENGINE = "numpy"  # One of STEP_ENGINES: "python", "numpy", "bitpacked" or "parallel"
+INCREMENTAL = True  # Only recompute and redraw tiles near last generation's changes
+TILE_SIZE = 16  # Cells per side of a dirty-tracking tile
+RULE = "B3/S23"  # Rule string or name (see rules.py); patterns with a rule of their own switch to it
+FAST_FORWARD_POWER = 10  # The F key jumps 2**FAST_FORWARD_POWER generations
+# Boards with more live cells jump by ordinary stepping: a busy soup rarely
+# repeats, so Hashlife gains nothing from its cache and a 200x150 soup takes
+# ~10s where stepping takes ~0.3s. The limit is about speed only, not the
+# result: Hashlife only runs where contained() says it matches stepping.
+FAST_FORWARD_MAX_POPULATION = 1000
+PATTERN_FILE = "pattern.rle"  # RLE or Life 1.06 file the L key loads on the pause screen
+SNAPSHOT_FILE = "conway.snapshot"  # Board file the S key saves and the O key opens
 
 # Colors (R, G, B)
 BLACK   = (0, 0, 0)
@@ -17,27 +45,30 @@ WHITE   = (255, 255, 255)
 GRAY    = (50, 50, 50)
 GREEN   = (0, 255, 0)
 RED     = (200, 0, 0)
+# Cell state -> color: dead, alive, then Generations' dying states fading out
+CELL_PALETTE = [BLACK, GREEN] + [(0, 150 - 110 * i // 253, 0) for i in range(254)]
 
 # --- Helper Functions ---
-def random_grid():
+def random_grid(rng=np.random):
     """Initialize a grid with a random state (0 or 1) for each cell."""
-    return np.random.choice([0, 1], size=(GRID_HEIGHT, GRID_WIDTH), p=[0.8, 0.2])
+    return rng.choice([0, 1], size=(GRID_HEIGHT, GRID_WIDTH), p=[0.8, 0.2])
 
-def update_grid(grid):
-    """Compute the next generation for Conway's Game of Life."""
+def step_python(grid):
+    """Compute the next generation one cell at a time (reference implementation)."""
+    height, width = grid.shape
     new_grid = grid.copy()
-    for i in range(GRID_HEIGHT):
-        for j in range(GRID_WIDTH):
+    for i in range(height):
+        for j in range(width):
             # Count the number of alive neighbors with wrap-around (toroidal grid)
             total = (
-                grid[(i-1) % GRID_HEIGHT, (j-1) % GRID_WIDTH] +
-                grid[(i-1) % GRID_HEIGHT, j] +
-                grid[(i-1) % GRID_HEIGHT, (j+1) % GRID_WIDTH] +
-                grid[i, (j-1) % GRID_WIDTH] +
-                grid[i, (j+1) % GRID_WIDTH] +
-                grid[(i+1) % GRID_HEIGHT, (j-1) % GRID_WIDTH] +
-                grid[(i+1) % GRID_HEIGHT, j] +
-                grid[(i+1) % GRID_HEIGHT, (j+1) % GRID_WIDTH]
+                grid[(i-1) % height, (j-1) % width] +
+                grid[(i-1) % height, j] +
+                grid[(i-1) % height, (j+1) % width] +
+                grid[i, (j-1) % width] +
+                grid[i, (j+1) % width] +
+                grid[(i+1) % height, (j-1) % width] +
+                grid[(i+1) % height, j] +
+                grid[(i+1) % height, (j+1) % width]
             )
             # Apply Conway's rules
             if grid[i, j] == 1:
@@ -48,107 +79,753 @@ def update_grid(grid):
                     new_grid[i, j] = 1  # Cell becomes alive
     return new_grid
 
-def reset_game():
-    """Reinitialize game state."""
-    grid = random_grid()
-    generation = 0
-    return grid, generation
+def step_numpy(grid):
+    """Compute the next generation with a rolled neighbor sum over the whole grid."""
+    up = np.roll(grid, 1, axis=0)
+    down = np.roll(grid, -1, axis=0)
+    rows = up + grid + down
+    # Sum of the 3x3 block minus the cell itself
+    total = np.roll(rows, 1, axis=1) + rows + np.roll(rows, -1, axis=1) - grid
+    new_grid = (total == 3) | ((grid == 1) & (total == 2))
+    return new_grid.astype(grid.dtype)
 
-# --- Main Game Function ---
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    pygame.display.set_caption("Conway's Game of Life")
-    clock = pygame.time.Clock()
-    font = pygame.font.SysFont("Arial", 20)
+# --- Bit-packed Engine ---
+# Each row is stored as little-endian uint64 words, 64 cells per word, with
+# column j at bit j % 64 of word j // 64. Bits past the grid width stay zero.
 
-    # Create restart button properties
-    button_width, button_height = 150, 40
-    button_rect = pygame.Rect(
-        (WINDOW_WIDTH - button_width) // 2,
-        (WINDOW_HEIGHT - button_height) // 2,
-        button_width,
-        button_height
+def pack_grid(grid):
+    """Pack a 0/1 grid into a (height, words) uint64 array."""
+    height, width = grid.shape
+    words = (width + 63) // 64
+    packed = np.packbits(grid.astype(np.uint8), axis=1, bitorder="little")
+    padded = np.zeros((height, words * 8), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    return padded.view("<u8")
+
+def unpack_grid(words, width, dtype=np.int64):
+    """Unpack a (height, words) uint64 array back into a 0/1 grid."""
+    bits = np.unpackbits(words.view(np.uint8), axis=1, bitorder="little")
+    return bits[:, :width].astype(dtype)
+
+def _shift_west(words, width):
+    """Return rows where each column holds its left neighbor (with wrap-around)."""
+    last_word, last_bit = divmod(width - 1, 64)
+    carry = np.zeros_like(words)
+    carry[:, 1:] = words[:, :-1] >> np.uint64(63)
+    shifted = (words << np.uint64(1)) | carry
+    # Column 0 wraps around to the last column
+    shifted[:, 0] |= (words[:, last_word] >> np.uint64(last_bit)) & np.uint64(1)
+    # Clear the bit that was pushed past the grid width
+    if width % 64:
+        shifted[:, -1] &= np.uint64((1 << (width % 64)) - 1)
+    return shifted
+
+def _shift_east(words, width):
+    """Return rows where each column holds its right neighbor (with wrap-around)."""
+    last_word, last_bit = divmod(width - 1, 64)
+    carry = np.zeros_like(words)
+    carry[:, :-1] = words[:, 1:] << np.uint64(63)
+    shifted = (words >> np.uint64(1)) | carry
+    # The last column wraps around to column 0
+    shifted[:, last_word] |= (words[:, 0] & np.uint64(1)) << np.uint64(last_bit)
+    return shifted
+
+def _full_add(a, b, c):
+    """Bitwise full adder: returns (sum, carry) for three bit planes."""
+    partial = a ^ b
+    return partial ^ c, (a & b) | (partial & c)
+
+def step_packed(words, width):
+    """Compute the next generation of a packed grid using bitwise adder logic."""
+    up = np.roll(words, 1, axis=0)
+    down = np.roll(words, -1, axis=0)
+    neighbors = (
+        _shift_west(up, width), up, _shift_east(up, width),
+        _shift_west(words, width), _shift_east(words, width),
+        _shift_west(down, width), down, _shift_east(down, width),
     )
+    # Add the eight neighbor planes into a 3-bit count (8 wraps to 0, which is harmless)
+    sum_a, carry_a = _full_add(*neighbors[0:3])
+    sum_b, carry_b = _full_add(*neighbors[3:6])
+    sum_c, carry_c = neighbors[6] ^ neighbors[7], neighbors[6] & neighbors[7]
+    ones, carry_d = _full_add(sum_a, sum_b, sum_c)
+    twos_partial, carry_e = _full_add(carry_a, carry_b, carry_c)
+    twos, carry_f = twos_partial ^ carry_d, twos_partial & carry_d
+    fours = carry_e ^ carry_f
+    # Alive next generation: count == 3, or count == 2 and alive now
+    return twos & ~fours & (ones | words)
 
-    # Initialize game state
-    grid, generation = reset_game()
-    paused = False  # Use pause to allow restarting or examine a state
+def step_bitpacked(grid):
+    """Compute the next generation by packing the grid into uint64 words."""
+    width = grid.shape[1]
+    return unpack_grid(step_packed(pack_grid(grid), width), width, grid.dtype)
 
-    running = True
-    while running:
-        clock.tick(FPS)
+STEP_ENGINES = {
+    "python": step_python,
+    "numpy": step_numpy,
+    "bitpacked": step_bitpacked,
+    "parallel": step_parallel,
+}
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+def update_grid(grid, engine=None):
+    """Compute the next generation for Conway's Game of Life."""
+    return STEP_ENGINES[engine or STEP_ENGINE](grid)
 
-            # Toggle pause with space bar
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    paused = not paused
+# --- Sparse Active-region Engine ---
+def tile_shape(grid, tile_size=TILE_SIZE):
+    """Return the (rows, columns) of tiles covering the grid."""
+    height, width = grid.shape
+    return -(-height // tile_size), -(-width // tile_size)
 
-            # Check for mouse click on Restart button when paused
-            if paused and event.type == pygame.MOUSEBUTTONDOWN:
-                if button_rect.collidepoint(event.pos):
-                    grid, generation = reset_game()
-                    paused = False
+def step_sparse(grid, active=None, tile_size=TILE_SIZE, rule=LIFE):
+    """Advance the grid in place, recomputing only tiles near recent changes.
 
-        # Only update the grid if not paused
-        if not paused:
-            grid = update_grid(grid)
-            generation += 1
+    `active` is a boolean mask (see tile_shape) of tiles that changed in the
+    previous generation, or None to recompute everything. Returns the mask of
+    tiles that changed in this generation, to pass back in next time. Any
+    rule works: a cell can only change if something within `rule.radius`
+    changed last generation.
+    """
+    height, width = grid.shape
+    if active is None:
+        active = np.ones(tile_shape(grid, tile_size), dtype=bool)
+    # A change can only affect cells in tiles within the rule's reach
+    reach = -(-rule.radius // tile_size)
+    near = active.copy()
+    for dy in range(-reach, reach + 1):
+        for dx in range(-reach, reach + 1):
+            near |= np.roll(np.roll(active, dy, axis=0), dx, axis=1)
+    tile_rows, tile_cols = np.nonzero(near)
+    changed = np.zeros_like(active)
+    if len(tile_rows) == 0:
+        return changed
 
-        # --- Drawing ---
-        screen.fill(BLACK)
+    # Gather every tile plus a halo as wide as the rule's radius in one
+    # fancy-indexing pass. Indices past the edge wrap, so partial edge tiles
+    # just recompute a few cells twice and write back identical values.
+    r = rule.radius
+    offsets = np.arange(-r, tile_size + r)
+    rows = (tile_rows[:, None] * tile_size + offsets) % height
+    cols = (tile_cols[:, None] * tile_size + offsets) % width
+    blocks = grid[rows[:, :, None], cols[:, None, :]]
 
-        # Draw scoreboard background
-        scoreboard_rect = pygame.Rect(0, 0, WINDOW_WIDTH, SCOREBOARD_HEIGHT)
-        pygame.draw.rect(screen, GRAY, scoreboard_rect)
+    middle = blocks[:, r:-r, r:-r]
+    alive = blocks == 1 if rule.states > 2 else blocks
+    new = next_states(middle, neighbor_counts(alive, rule), rule).astype(grid.dtype, copy=False)
 
-        # Render generation counter on scoreboard
-        gen_text = font.render(f"Generation: {generation}", True, WHITE)
-        screen.blit(gen_text, (10, 10))
+    changed[tile_rows, tile_cols] = (new != middle).any(axis=(1, 2))
+    grid[rows[:, r:-r, None], cols[:, None, r:-r]] = new
+    return changed
+
+# --- Hashlife Fast-forward ---
+HASHLIFE = HashLife()
+
+def fast_forward(grid, power=FAST_FORWARD_POWER):
+    """Advance the board 2**power generations with Hashlife.
+
+    Hashlife runs on an unbounded plane, so unlike update_grid the edges do
+    not wrap; anything that leaves the visible board is dropped.
+    """
+    height, width = grid.shape
+    root = HASHLIFE.advance(HASHLIFE.from_grid(grid), 2 ** power)
+    return HASHLIFE.to_grid(root, height, width, grid.dtype)
+
+def contained(grid, generations):
+    """Return True if nothing on `grid` can reach an edge within `generations`.
+
+    Nothing spreads faster than a cell a generation, so then the wrapped board
+    and Hashlife's unbounded plane evolve alike and fast_forward() is exact.
+    """
+    rows, cols = np.nonzero(grid)
+    if not len(rows):
+        return True
+    height, width = grid.shape
+    return (rows.min() >= generations and cols.min() >= generations
+            and rows.max() + generations < height and cols.max() + generations < width)
+
+# --- Snapshots ---
+# A 96-byte header (magic, format version, height, width, bits per cell,
+# generation, rule) followed by the board. Two-state boards are stored in
+# pack_grid's layout, so a board already held packed is written as is;
+# boards with more states take a byte per cell. The file is memory-mapped,
+# so opening one costs nothing until cells are touched.
+SNAPSHOT_MAGIC = b"LIFESNAP"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("height", "<u4"), ("width", "<u4"),
+                            ("bits", "<u4"), ("generation", "<u8"), ("rule", "S64")])
+
+def _snapshot_body(bits, height, width):
+    """Return the dtype and shape of a snapshot's board."""
+    return ("<u8", (height, (width + 63) // 64)) if bits == 1 else ("u1", (height, width))
+
+def save_snapshot(path, grid, generation=0, rule=RULE, width=None):
+    """Write a board and its rule to `path`.
+
+    For two-state rules, pass pack_grid() words and their `width` to skip packing.
+    """
+    bits = 1 if parse_rule(rule).states == 2 else 8
+    if bits == 1:
+        words = grid if width is not None else pack_grid(grid)
+    elif width is not None:
+        raise ValueError(f"{rule} has more than two states; pass the board unpacked")
+    else:
+        words = grid
+    width = width if width is not None else grid.shape[1]
+    if len(rule.encode()) > SNAPSHOT_HEADER["rule"].itemsize:
+        raise ValueError(f"Rule {rule!r} is too long for a snapshot")
+    header = np.array([(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, words.shape[0], width, bits, generation, rule.encode())],
+                      dtype=SNAPSHOT_HEADER)
+    header.tofile(path)
+    dtype, shape = _snapshot_body(bits, words.shape[0], width)
+    body = np.memmap(path, dtype=dtype, mode="r+", offset=SNAPSHOT_HEADER.itemsize, shape=shape)
+    body[:] = words
+    body.flush()
+
+def open_snapshot(path, mode="r"):
+    """Memory-map a snapshot; return (body, width, generation, rule) without reading the board.
+
+    `body` holds pack_grid() words for two-state rules and a byte per cell otherwise.
+    """
+    header = np.fromfile(path, dtype=SNAPSHOT_HEADER, count=1)
+    if not len(header) or header[0]["magic"] != SNAPSHOT_MAGIC or header[0]["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is not a board snapshot")
+    header = header[0]
+    height, width = int(header["height"]), int(header["width"])
+    dtype, shape = _snapshot_body(int(header["bits"]), height, width)
+    body = np.memmap(path, dtype=dtype, mode=mode, offset=SNAPSHOT_HEADER.itemsize, shape=shape)
+    return body, width, int(header["generation"]), header["rule"].decode()
+
+def load_snapshot(path):
+    """Read a snapshot back into a grid of cell states; return (grid, generation, rule)."""
+    body, width, generation, rule = open_snapshot(path)
+    if body.dtype == np.uint8:
+        return np.array(body, dtype=np.int64), generation, rule
+    return unpack_grid(body, width), generation, rule
+
+# --- Game State ---
+def check_states(grid, rule):
+    """Raise ValueError unless every cell of `grid` holds a state that `rule` has."""
+    states = parse_rule(rule).states
+    if grid.size and (grid.min() < 0 or grid.max() >= states):
+        raise ValueError(f"pattern has cell states up to {grid.max()}, but rule {rule} has {states}")
+
+# Player inputs, as (kind, row, column) tuples; only TOGGLE uses the cell
+PAUSE, FAST_FORWARD, RESTART, TOGGLE = range(4)
+
+class LifeGame:
+    """The board, generation counter and pause state, advanced one tick at a time.
+
+    A tick is one frame of main(): it applies that frame's inputs and then
+    steps a generation unless the game is paused. Everything random comes
+    from a seeded generator, so the seed and the inputs determine a run.
+    """
+
+    def __init__(self, seed=None):
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.ticks = 0
+        self.rule = RULE
+        self.restart()
+
+    def restart(self):
+        """Start over with a new random board."""
+        HASHLIFE.clear()
+        self.grid = random_grid(self.rng)
+        self.generation = 0
+        self.paused = False  # Use pause to allow restarting or examine a state
+        self.active = None  # Tiles that changed last generation (None means all of them)
+        self.last_jump = None  # How the last fast-forward went, for the scoreboard
+
+    def load(self, grid, generation=0, rule=None):
+        """Replace the board, e.g. with a loaded pattern or snapshot, and optionally the rule."""
+        grid = np.asarray(grid, dtype=np.int64)
+        # Reject a bad rule, or cells it has no state for, before the board changes hands
+        check_states(grid, rule or self.rule)
+        self.grid = grid
+        self.generation = generation
+        self.active = None
+        if rule:
+            self.rule = rule
+
+    def apply(self, event):
+        kind, row, col = event
+        if kind == PAUSE:
+            self.paused = not self.paused
+        elif kind == FAST_FORWARD:
+            # Fast-forward with Hashlife, which only knows B3/S23, when it gives the same board as
+            # stepping and the board is not too busy for it
+            start = time.perf_counter()
+            rule = parse_rule(self.rule)
+            population = int(np.count_nonzero(self.grid == 1))
+            if (rule is LIFE and population <= FAST_FORWARD_MAX_POPULATION
+                    and contained(self.grid, 2 ** FAST_FORWARD_POWER)):
+                self.grid = fast_forward(self.grid)
+                self.last_jump = {"engine": "hashlife", **HASHLIFE.stats()}
+            else:
+                for _ in range(2 ** FAST_FORWARD_POWER):
+                    self.grid = update_grid(self.grid) if rule is LIFE else step_rule(self.grid, rule)
+                self.last_jump = {"engine": "stepping"}
+            self.last_jump.update(generations=2 ** FAST_FORWARD_POWER, population=population,
+                                  seconds=time.perf_counter() - start)
+            self.generation += 2 ** FAST_FORWARD_POWER
+            self.active = None
+        elif kind == RESTART:
+            self.restart()
+        elif kind == TOGGLE:
+            self.grid[row, col] = 0 if self.grid[row, col] else 1
+            self.active = None
+
+    def step(self, inputs=()):
+        """Apply this tick's inputs, then advance a generation unless paused."""
+        for event in inputs:
+            self.apply(event)
+        self.ticks += 1
+        if not self.paused:
+            rule = parse_rule(self.rule)
+            if INCREMENTAL:
+                self.active = step_sparse(self.grid, self.active, rule=rule)
+            elif rule is LIFE:
+                self.grid = update_grid(self.grid)
+            else:
+                self.grid = step_rule(self.grid, rule)
+            self.generation += 1
+
+    def snapshot(self):
+        """Return the state as plain data, with a two-state board packed to one bit per cell."""
+        two_state = parse_rule(self.rule).states == 2
+        return {
+            "rng": self.rng.bit_generator.state,
+            "shape": self.grid.shape,
+            "rule": self.rule,
+            "cells": np.packbits(self.grid.astype(bool)) if two_state else self.grid.astype(np.uint8),
+            "generation": self.generation,
+            "paused": self.paused,
+            "ticks": self.ticks,
+        }
+
+    def restore(self, state):
+        self.rng.bit_generator.state = state["rng"]
+        height, width = state["shape"]
+        self.rule = state["rule"]
+        cells = state["cells"]
+        if cells.ndim == 1:
+            cells = np.unpackbits(cells, count=height * width).reshape(height, width)
+        self.grid = cells.astype(np.int64)
+        self.generation = state["generation"]
+        self.paused = state["paused"]
+        self.ticks = state["ticks"]
+        self.active = None
+        self.last_jump = None
+
+# --- Simulation Worker ---
+# Commands the frame loop sends to the worker: a list of inputs for the next
+# step, a (grid, generation) board to load, or the request to exit
+INPUTS, LOAD, STOP = range(3)
+
+class GenerationBuffer:
+    """A triple buffer of finished generations in shared memory.
+
+    The worker writes each generation into the back slot and swaps it with
+    the middle one; the frame loop swaps the middle slot to the front when a
+    newer generation is waiting and draws from there. Either side holds the
+    lock only for a swap, so a slow generation never stalls drawing and the
+    front slot is never written while it is drawn. Shared memory lets the
+    same buffer serve a worker thread or a worker process.
+    """
+
+    def __init__(self, shape, tiles):
+        height, width = shape
+        self.shape, self.tiles = shape, tiles
+        self._blocks = [shared_memory.SharedMemory(create=True, size=3 * height * width),
+                        shared_memory.SharedMemory(create=True, size=3 * tiles[0] * tiles[1])]
+        self._owner = os.getpid()  # Only the creating process unlinks, however the worker was started
+        # _info holds each slot's (generation, paused); _slots is front, middle, back, fresh
+        self._info = mp.Array("q", 6, lock=False)
+        self._slots = mp.Array("i", [0, 1, 2, 0], lock=False)
+        self._lock = mp.Lock()
+        self._attach()
+
+    def _attach(self):
+        self.cells = np.ndarray((3,) + self.shape, dtype=np.uint8, buffer=self._blocks[0].buf)
+        self.dirty = np.ndarray((3,) + self.tiles, dtype=bool, buffer=self._blocks[1].buf)
+
+    def __getstate__(self):
+        # Sent to a worker process: it reattaches to the shared memory by name
+        return (self.shape, self.tiles, [block.name for block in self._blocks],
+                self._info, self._slots, self._lock, self._owner)
+
+    def __setstate__(self, state):
+        self.shape, self.tiles, names, self._info, self._slots, self._lock, self._owner = state
+        self._blocks = [shared_memory.SharedMemory(name=name) for name in names]
+        self._attach()
 
-        # Draw playing area (grid area)
-        for i in range(GRID_HEIGHT):
-            for j in range(GRID_WIDTH):
-                cell_value = grid[i, j]
-                color = GREEN if cell_value == 1 else BLACK
-                cell_rect = pygame.Rect(
-                    j * CELL_SIZE,
-                    i * CELL_SIZE + SCOREBOARD_HEIGHT,
-                    CELL_SIZE,
-                    CELL_SIZE
-                )
-                pygame.draw.rect(screen, color, cell_rect)
-
-        # Optionally draw grid lines for clarity
+    def publish(self, grid, generation, paused, changed):
+        """Hand over a finished generation; `changed` is its tile mask, None for all tiles."""
+        back = self._slots[2]
+        self.cells[back] = grid
+        self.dirty[back] = True if changed is None else changed
+        self._info[2 * back], self._info[2 * back + 1] = generation, paused
+        with self._lock:
+            middle = self._slots[1]
+            if self._slots[3]:
+                # The frame loop never saw the middle generation, so carry its changes along
+                self.dirty[back] |= self.dirty[middle]
+            self._slots[1], self._slots[2], self._slots[3] = back, middle, 1
+
+    def latest(self):
+        """Return (grid, changed tiles, generation, paused) for the newest generation.
+
+        The grid is a view that stays valid until the next call. The tile
+        mask covers everything that changed since the previous call, so it
+        is empty when no new generation has been published.
+        """
+        with self._lock:
+            fresh = self._slots[3]
+            if fresh:
+                self._slots[0], self._slots[1], self._slots[3] = self._slots[1], self._slots[0], 0
+            front = self._slots[0]
+        changed = self.dirty[front] if fresh else np.zeros(self.tiles, dtype=bool)
+        return self.cells[front], changed, self._info[2 * front], bool(self._info[2 * front + 1])
+
+    def close(self):
+        del self.cells, self.dirty
+        for block in self._blocks:
+            block.close()
+            if self._owner == os.getpid():
+                block.unlink()
+
+def _run_worker(buffer, game, commands, rate, record=None, seed=None):
+    """Step `game` at `rate` generations per second (0 for flat out) until told to stop.
+
+    Every step is published into `buffer`. Inputs are applied as soon as
+    they arrive rather than at the next due step, so pausing responds at
+    any rate. With `record`, the worker writes the replay log.
+    """
+    recorder = replay.Recorder(record, "conway", game, seed) if record else None
+    interval = 1 / rate if rate else 0.0
+    due = time.perf_counter()
+    try:
+        while True:
+            inputs = []
+            try:
+                # Sleep until the next step is due, or until told something when paused
+                kind, payload = commands.get(timeout=None if game.paused else max(due - time.perf_counter(), 0))
+                while True:
+                    if kind == STOP:
+                        return
+                    if kind == LOAD:
+                        game.load(*payload)
+                        if recorder:
+                            recorder.reset()
+                        buffer.publish(game.grid, game.generation, game.paused, None)
+                    else:
+                        inputs.extend(payload)
+                    kind, payload = commands.get_nowait()
+            except queue.Empty:
+                pass
+
+            now = time.perf_counter()
+            if not inputs and (game.paused or now < due):
+                continue
+            game.step(inputs)
+            if recorder:
+                recorder.record(inputs)
+            buffer.publish(game.grid, game.generation, game.paused, game.active)
+            # Fall behind rather than burst to catch up after a slow generation
+            due = now + interval if inputs else max(due + interval, now)
+    finally:
+        if recorder:
+            recorder.close()
+
+def _run_worker_process(buffer, *args):
+    try:
+        _run_worker(buffer, *args)
+    finally:
+        buffer.close()  # Detach this process's view of the shared memory
+
+class LifeWorker:
+    """Run a LifeGame on a worker thread or process at its own generation rate.
+
+    It has the attributes main() draws from (grid, generation, paused and
+    active), refreshed from the latest finished generation on every step(),
+    so the window stays responsive however long a generation takes. A thread
+    suits the NumPy engines, which release the GIL in their array loops; a
+    process suits the pure-Python engine.
+    """
+
+    def __init__(self, game, mode="thread", rate=GENERATIONS_PER_SECOND, record=None, seed=None):
+        self.buffer = GenerationBuffer(game.grid.shape, tile_shape(game.grid))
+        self.buffer.publish(game.grid, game.generation, game.paused, None)
+        if mode == "process":
+            self._commands = mp.Queue()
+            worker, target = mp.Process, _run_worker_process
+        elif mode == "thread":
+            self._commands = queue.Queue()
+            worker, target = threading.Thread, _run_worker
+        else:
+            raise ValueError(f"unknown worker mode {mode!r}")
+        self._worker = worker(target=target, args=(self.buffer, game, self._commands, rate, record, seed), daemon=True)
+        self._worker.start()
+        self._game = game if mode == "thread" else None
+        self.rule = game.rule  # Only load() changes it, so it is known here without asking the worker
+        self.step()
+
+    def step(self, inputs=()):
+        """Send this frame's inputs to the worker and pick up its newest generation."""
+        if inputs:
+            self._commands.put((INPUTS, list(inputs)))
+        self.grid, self.active, self.generation, self.paused = self.buffer.latest()
+
+    @property
+    def last_jump(self):
+        """The game's last fast-forward, when the worker is a thread that shares it; else None."""
+        return self._game.last_jump if self._game else None
+
+    def load(self, grid, generation=0, rule=None):
+        grid = np.asarray(grid, dtype=np.int64)
+        check_states(grid, rule or self.rule)  # Raise here rather than in the worker
+        self.rule = rule or self.rule
+        self._commands.put((LOAD, (grid, generation, rule)))
+
+    def close(self):
+        """Stop the worker, waiting for it to finish its generation and its replay log."""
+        self._commands.put((STOP, None))
+        self._worker.join()
+        self.buffer.close()
+
+# --- Rendering ---
+def describe_jump(jump):
+    """Return a scoreboard line about the last fast-forward (see LifeGame.last_jump), or None."""
+    if not jump:
+        return None
+    text = f"Jumped {jump['generations']} generations in {jump['seconds']:.2f}s ({jump['engine']}"
+    if jump["engine"] == "hashlife":
+        text += (f", {jump['hit_rate']:.0%} cache hits, {jump['nodes']:,} nodes,"
+                 f" {jump['memory_bytes'] / 2 ** 20:.1f} MB")
+    return text + ")"
+
+class GridRenderer:
+    """Draw the board by blitting the grid array instead of one rect per cell."""
+
+    def __init__(self, font, button_rect):
+        self.font = font
+        self.button_rect = button_rect
+        self.grid_top = SCOREBOARD_HEIGHT
+        self.status = None  # Text shown on the right of the scoreboard
+
+        # One pixel per cell; the palette maps cell states straight to colors
+        self.cell_surface = pygame.Surface((GRID_WIDTH, GRID_HEIGHT), depth=8)
+        self.cell_surface.set_palette(CELL_PALETTE)
+        self.scaled_surface = pygame.Surface((GRID_WIDTH * CELL_SIZE, GRID_HEIGHT * CELL_SIZE), depth=8)
+        self.scaled_surface.set_palette(CELL_PALETTE)
+
+        # Grid lines never change, so draw them once onto a color-keyed overlay
+        self.grid_lines = self._render_grid_lines()
+
+        # Pause overlay and its text are also static
+        self.pause_overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+        self.pause_overlay.fill((0, 0, 0, 150))
+        self.pause_text = font.render("Paused", True, WHITE)
+        self.pause_rect = self.pause_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2 - 50))
+        self.restart_text = font.render("Restart", True, WHITE)
+        self.restart_rect = self.restart_text.get_rect(center=button_rect.center)
+        self.keys_text = font.render("L: load pattern   S: save snapshot   O: open snapshot", True, WHITE)
+        self.keys_rect = self.keys_text.get_rect(center=(WINDOW_WIDTH//2, button_rect.bottom + 30))
+
+    def _render_grid_lines(self):
+        width, height = GRID_WIDTH * CELL_SIZE, GRID_HEIGHT * CELL_SIZE
+        key = (255, 0, 255)
+        surface = pygame.Surface((width, height))
+        surface.fill(key)
+        surface.set_colorkey(key)
         for i in range(GRID_HEIGHT + 1):
-            pygame.draw.line(screen, GRAY, (0, i * CELL_SIZE + SCOREBOARD_HEIGHT), (WINDOW_WIDTH, i * CELL_SIZE + SCOREBOARD_HEIGHT))
+            pygame.draw.line(surface, GRAY, (0, i * CELL_SIZE), (width, i * CELL_SIZE))
         for j in range(GRID_WIDTH + 1):
-            pygame.draw.line(screen, GRAY, (j * CELL_SIZE, SCOREBOARD_HEIGHT), (j * CELL_SIZE, WINDOW_HEIGHT))
+            pygame.draw.line(surface, GRAY, (j * CELL_SIZE, 0), (j * CELL_SIZE, height))
+        return surface.convert()
+
+    def draw_scoreboard(self, screen, generation):
+        scoreboard_rect = pygame.Rect(0, 0, WINDOW_WIDTH, SCOREBOARD_HEIGHT)
+        pygame.draw.rect(screen, GRAY, scoreboard_rect)
+        gen_text = self.font.render(f"Generation: {generation}", True, WHITE)
+        screen.blit(gen_text, (10, 10))
+        if self.status:
+            status_text = self.font.render(self.status, True, WHITE)
+            screen.blit(status_text, (WINDOW_WIDTH - status_text.get_width() - 10, 10))
+
+    def draw_grid(self, screen, grid):
+        # surfarray is indexed (x, y), the grid is indexed (row, column)
+        pygame.surfarray.blit_array(self.cell_surface, grid.T)
+        pygame.transform.scale(self.cell_surface, self.scaled_surface.get_size(), self.scaled_surface)
+        screen.blit(self.scaled_surface, (0, self.grid_top))
+        screen.blit(self.grid_lines, (0, self.grid_top))
+
+    def draw_dirty(self, screen, grid, generation, dirty, tile_size=TILE_SIZE):
+        """Redraw only the scoreboard and the tiles in the `dirty` mask.
+
+        Returns the screen rects that changed, for pygame.display.update().
+        """
+        self.draw_scoreboard(screen, generation)
+        rects = [pygame.Rect(0, 0, WINDOW_WIDTH, SCOREBOARD_HEIGHT)]
+        pixels = pygame.surfarray.pixels2d(self.cell_surface)
+        for tile_row, tile_col in zip(*np.nonzero(dirty)):
+            cells = pygame.Rect(tile_col * tile_size, tile_row * tile_size, tile_size, tile_size)
+            cells = cells.clip(self.cell_surface.get_rect())
+            pixels[cells.left:cells.right, cells.top:cells.bottom] = grid[cells.top:cells.bottom, cells.left:cells.right].T
+            area = pygame.Rect(cells.left * CELL_SIZE, cells.top * CELL_SIZE, cells.width * CELL_SIZE, cells.height * CELL_SIZE)
+            rects.append(area.move(0, self.grid_top))
+        del pixels  # Unlock the surface before scaling from it
+
+        for rect in rects[1:]:
+            area = rect.move(0, -self.grid_top)
+            cells = pygame.Rect(area.left // CELL_SIZE, area.top // CELL_SIZE, area.width // CELL_SIZE, area.height // CELL_SIZE)
+            scaled = self.scaled_surface.subsurface(area)
+            pygame.transform.scale(self.cell_surface.subsurface(cells), area.size, scaled)
+            screen.blit(scaled, rect)
+            screen.blit(self.grid_lines, rect, area)
+        return rects
 
-        # If paused, display a Restart button overlay
+    def draw_pause(self, screen):
+        screen.blit(self.pause_overlay, (0, 0))
+        screen.blit(self.pause_text, self.pause_rect)
+        pygame.draw.rect(screen, RED, self.button_rect)
+        screen.blit(self.restart_text, self.restart_rect)
+        screen.blit(self.keys_text, self.keys_rect)
+
+    def draw(self, screen, grid, generation, paused):
+        self.draw_scoreboard(screen, generation)
+        self.draw_grid(screen, grid)
         if paused:
-            # Dim the screen slightly
-            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 150))
-            screen.blit(overlay, (0, 0))
+            self.draw_pause(screen)
+
+# --- Main Game Function ---
+def restart_button_rect(button_width=150, button_height=40):
+    """Return the pause screen's Restart button, centered in the window."""
+    return pygame.Rect(
+        (WINDOW_WIDTH - button_width) // 2,
+        (WINDOW_HEIGHT - button_height) // 2,
+        button_width,
+        button_height
+    )
+
+def main(fps=FPS, max_frames=None, seed=None, record=None, worker=SIM_WORKER,
+         generations_per_sec=GENERATIONS_PER_SECOND, capture=None):
+    """Run the game. fps=0 disables the frame cap; max_frames stops after that many frames.
+
+    `record` is a path to write a replay log of the session to (see replay.py).
+    `capture` is a video or PNG path to stream the frames to (see capture.py).
+    `worker` ("thread" or "process") steps generations in the background at
+    `generations_per_sec` while each frame draws the newest one; without it,
+    every frame steps one generation.
+    """
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption("Conway's Game of Life")
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont("Arial", 20)
+
+    button_rect = restart_button_rect()
+    renderer = GridRenderer(font, button_rect)
+
+    # Initialize game state
+    game = LifeGame(seed)
+    if worker:
+        # The worker owns the game from here on and writes the replay log itself
+        game = LifeWorker(game, worker, generations_per_sec, record, seed)
+        recorder = None
+    else:
+        recorder = replay.Recorder(record, "conway", game, seed) if record else None
+    capturer = FrameCapture(capture, screen.get_size(), fps or CAPTURE_FPS) if capture else None
+    full_redraw = True
+
+    running = True
+    frames = 0
+    while running:
+        clock.tick(fps)
 
-            pause_text = font.render("Paused", True, WHITE)
-            pause_rect = pause_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2 - 50))
-            screen.blit(pause_text, pause_rect)
+        with PROFILER.scope("events"):
+            inputs = []
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
 
-            pygame.draw.rect(screen, RED, button_rect)
-            restart_text = font.render("Restart", True, WHITE)
-            restart_rect = restart_text.get_rect(center=button_rect.center)
-            screen.blit(restart_text, restart_rect)
+                # Toggle pause with space bar
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_SPACE:
+                        inputs.append((PAUSE, 0, 0))
+                    # Show or hide the profiling overlay
+                    elif event.key == OVERLAY_KEY:
+                        PROFILER.toggle_overlay()
+                        full_redraw = True
+                    # Fast-forward with Hashlife
+                    elif event.key == pygame.K_f:
+                        inputs.append((FAST_FORWARD, 0, 0))
+                    # Pattern and snapshot files, from the pause screen
+                    elif game.paused and event.key in (pygame.K_l, pygame.K_s, pygame.K_o):
+                        try:
+                            if event.key == pygame.K_l:
+                                cells, rule = patterns.load_pattern(PATTERN_FILE, game.grid.shape)
+                                game.load(patterns.place(cells, game.grid.shape), rule=rule)
+                            elif event.key == pygame.K_s:
+                                save_snapshot(SNAPSHOT_FILE, game.grid, game.generation, game.rule)
+                            else:
+                                grid, generation, rule = load_snapshot(SNAPSHOT_FILE)
+                                game.load(patterns.place(grid, game.grid.shape), generation, rule)
+                        except (OSError, ValueError) as error:
+                            print(f"Conway: {error}", file=sys.stderr)
+                        else:
+                            full_redraw = True
+                            if recorder and event.key != pygame.K_s:
+                                # The board changed outside the game's inputs, so log all of it
+                                recorder.reset()
 
-        pygame.display.flip()
+                # When paused, click the Restart button, or click a cell to flip it
+                if game.paused and event.type == pygame.MOUSEBUTTONDOWN:
+                    x, y = event.pos
+                    if button_rect.collidepoint(event.pos):
+                        inputs.append((RESTART, 0, 0))
+                    elif y >= SCOREBOARD_HEIGHT:
+                        inputs.append((TOGGLE, (y - SCOREBOARD_HEIGHT) // CELL_SIZE, x // CELL_SIZE))
 
+        with PROFILER.scope("simulate"):
+            game.step(inputs)
+        if recorder:
+            recorder.record(inputs)
+        full_redraw = full_redraw or bool(inputs)
+        renderer.status = describe_jump(game.last_jump)
+
+        # --- Drawing ---
+        with PROFILER.scope("render"):
+            if INCREMENTAL and not game.paused and not full_redraw:
+                rects = renderer.draw_dirty(screen, game.grid, game.generation, game.active)
+                if PROFILER.show_overlay:
+                    rects.append(PROFILER.draw(screen))
+                pygame.display.update(rects)
+            else:
+                renderer.draw(screen, game.grid, game.generation, game.paused)
+                if PROFILER.show_overlay:
+                    PROFILER.draw(screen)
+                pygame.display.flip()
+                full_redraw = game.paused
+        if capturer:
+            with PROFILER.scope("capture"):
+                capturer.capture(screen)
+
+        frames += 1
+        if max_frames is not None and frames >= max_frames:
+            running = False
+
+    if recorder:
+        recorder.close()
+    if capturer:
+        capturer.close()
+    if worker:
+        game.close()
     pygame.quit()
-    sys.exit()
+    return frames
 
 if __name__ == "__main__":
     main()
+    sys.exit()
@@ -1,15 +1,39 @@
 import pygame
 import sys
+import heapq
+import math
 import random
+import statistics
+import time
+from array import array
+from collections import deque
+from multiprocessing import Pool
+
+import numpy as np
+
+import replay
+from capture import CAPTURE_FPS, FrameCapture
+from profiler import PROFILER, OVERLAY_KEY
 
 # --- Configuration ---
 CELL_SIZE = 20
-GRID_WIDTH = 50
+GRID_WIDTH = 50  # Cells in view; the board itself can be bigger (see Camera)
 GRID_HEIGHT = 40
+BOARD_WIDTH = GRID_WIDTH
+BOARD_HEIGHT = GRID_HEIGHT
+NUM_SNAKES = 2
+FOOD_COUNT = 1  # Food items kept on the board
+FOOD_BUCKET = 16  # Side of the square blocks FoodIndex sorts food into
+FOOD_PLACEMENT_TRIES = 8  # Random cells tried before leaving a food for the next tick
+SCROLL_STEP = 5  # Cells the arrow keys move the camera
 SCOREBOARD_HEIGHT = 40  # Extra space at the top for the scoreboard
 WINDOW_WIDTH = CELL_SIZE * GRID_WIDTH
 WINDOW_HEIGHT = CELL_SIZE * GRID_HEIGHT + SCOREBOARD_HEIGHT
 FPS = 10
+MAX_TICKS = 10_000  # Headless matches stop here even if both snakes survive
+SNAKE_AI = "path"  # Default controller, one of CONTROLLERS: "greedy" or "path"
+AI_NODE_BUDGET = 4 * GRID_WIDTH * GRID_HEIGHT  # Cells a controller may expand per tick
+AI_TIME_BUDGET = None  # Optional seconds a controller may spend per tick
 
 # Colors (R, G, B)
 BLACK   = (0, 0, 0)
@@ -26,14 +50,12 @@ DOWN = (0, 1)
 LEFT = (-1, 0)
 RIGHT = (1, 0)
 DIRECTIONS = [UP, DOWN, LEFT, RIGHT]
+STUCK = (0, 0)  # Recorded when a snake had no move left; forcing it kills the snake in place
 
 # --- Helper Functions ---
-def get_random_position(exclude):
-    """Return a random position on the grid not in the exclude set."""
-    while True:
-        pos = (random.randint(0, GRID_WIDTH - 1), random.randint(0, GRID_HEIGHT - 1))
-        if pos not in exclude:
-            return pos
+def get_random_position(occupancy, rng=random):
+    """Return a random free position on the grid, or None if the board is full."""
+    return occupancy.random_free(rng)
 
 def add_tuples(a, b):
     return (a[0] + b[0], a[1] + b[1])
@@ -41,45 +63,391 @@ def add_tuples(a, b):
 def manhattan_distance(a, b):
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-# --- Snake Class ---
-class Snake:
-    def __init__(self, init_positions, color):
-        self.positions = init_positions  # list of tuples, head is first element
-        self.direction = random.choice(DIRECTIONS)
-        self.color = color
-        self.alive = True
-        self.score = len(init_positions)  # starting score is initial length
-
-    def get_head(self):
-        return self.positions[0]
-
-    def move(self, food, obstacles):
-        if not self.alive:
+def start_positions(count, width, height, margin=5):
+    """Spread `count` starting cells over a lattice inset `margin` cells from the walls.
+
+    Two snakes start in opposite corners, as in the original game.
+    """
+    side = math.isqrt(count - 1) + 1 if count > 1 else 1
+    xs = sorted({margin + (width - 1 - 2 * margin) * i // max(side - 1, 1) for i in range(side)})
+    ys = sorted({margin + (height - 1 - 2 * margin) * i // max(side - 1, 1) for i in range(side)})
+    lattice = [(x, y) for y in ys for x in xs]
+    if len(lattice) < count or min(xs) < 0 or min(ys) < 0:
+        raise ValueError(f"a {width}x{height} board has no room for {count} snakes")
+    if count == 1:
+        return lattice[:1]
+    return [lattice[round(i * (len(lattice) - 1) / (count - 1))] for i in range(count)]
+
+def snake_color(i):
+    """Green and blue for the first two snakes, then hues spread around the color wheel."""
+    if i < 2:
+        return (GREEN, BLUE)[i]
+    color = pygame.Color(0)
+    color.hsva = ((i * 137.5) % 360, 80, 85, 100)
+    return tuple(color)[:3]
+
+# --- Occupancy Grid ---
+class Occupancy:
+    """Count of snake segments in every cell, shared by all snakes on a board.
+
+    Snakes update it as they push a head and pop a tail, so membership tests
+    are O(1) and nothing is rebuilt per tick. Supports `pos in occupancy`.
+
+    It also keeps an index of free cells: `free` lists every empty cell and
+    `slots` maps a cell to its place in that list (-1 if occupied). Cells
+    are swap-removed, so picking a random free cell is O(1) however full the
+    board gets. `owners` records which snake (index + 1, 0 for none) last
+    entered each cell, so the renderer can color a view straight from it.
+    """
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.width = width
+        self.height = height
+        self.cells = bytearray(width * height)
+        self.owners = array("i", bytes(4 * width * height))
+        self.free = array("i", range(width * height))
+        self.slots = array("i", range(width * height))
+
+    def in_bounds(self, pos):
+        return 0 <= pos[0] < self.width and 0 <= pos[1] < self.height
+
+    def count(self, pos):
+        if not self.in_bounds(pos):
+            return 0
+        return self.cells[pos[1] * self.width + pos[0]]
+
+    def __contains__(self, pos):
+        return self.count(pos) > 0
+
+    def add(self, pos, owner=1):
+        # A snake that ran into a wall leaves its head off the grid; ignore it
+        if self.in_bounds(pos):
+            i = pos[1] * self.width + pos[0]
+            if self.cells[i] == 0:
+                self._take(i)
+            self.cells[i] += 1
+            self.owners[i] = owner
+
+    def remove(self, pos):
+        if self.in_bounds(pos):
+            i = pos[1] * self.width + pos[0]
+            self.cells[i] -= 1
+            if self.cells[i] == 0:
+                self._release(i)
+                self.owners[i] = 0
+
+    def _take(self, i):
+        # Move the last free cell into i's slot, then drop the last slot
+        slot = self.slots[i]
+        last = self.free.pop()
+        if last != i:
+            self.free[slot] = last
+            self.slots[last] = slot
+        self.slots[i] = -1
+
+    def _release(self, i):
+        self.slots[i] = len(self.free)
+        self.free.append(i)
+
+    @property
+    def full(self):
+        return not self.free
+
+    def random_free(self, rng=random):
+        """Return a random empty cell, or None if there is none."""
+        if not self.free:
+            return None
+        i = self.free[rng.randrange(len(self.free))]
+        return (i % self.width, i // self.width)
+
+# --- Food Index ---
+class FoodIndex:
+    """The food on a board, bucketed into square blocks for nearest-food queries.
+
+    nearest() searches rings of blocks outward from a cell and stops once no
+    unsearched block can hold anything closer, so a query on a big board
+    looks at the blocks near the cell rather than at every food item.
+    Supports `pos in foods`, len() and iteration in placement order.
+    """
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, bucket=FOOD_BUCKET):
+        self.bucket = bucket
+        self.rings = max(-(-width // bucket), -(-height // bucket))  # Rings that cover the board
+        self.items = {}  # pos -> None, kept in placement order
+        self.buckets = {}  # (column, row) of a block -> positions in it
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, pos):
+        return pos in self.items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, pos):
+        self.items[pos] = None
+        self.buckets.setdefault((pos[0] // self.bucket, pos[1] // self.bucket), []).append(pos)
+
+    def remove(self, pos):
+        del self.items[pos]
+        key = (pos[0] // self.bucket, pos[1] // self.bucket)
+        self.buckets[key].remove(pos)
+        if not self.buckets[key]:
+            del self.buckets[key]
+
+    def nearest(self, pos):
+        """Return the food closest to `pos` (Manhattan distance), or None if there is none."""
+        if len(self.items) <= 2 * len(DIRECTIONS):
+            # A handful of items is quicker to scan than to search for
+            return min(self.items, key=lambda food: (manhattan_distance(pos, food), food[1], food[0]), default=None)
+        column, row = pos[0] // self.bucket, pos[1] // self.bucket
+        best, best_key = None, None
+        for ring in range(self.rings + 1):
+            # Every cell in this ring of blocks is at least this far away
+            if best is not None and (ring - 1) * self.bucket + 1 > best_key[0]:
+                break
+            for key in self._ring(column, row, ring):
+                for food in self.buckets.get(key, ()):
+                    food_key = (manhattan_distance(pos, food), food[1], food[0])
+                    if best_key is None or food_key < best_key:
+                        best, best_key = food, food_key
+        return best
+
+    @staticmethod
+    def _ring(column, row, ring):
+        if ring == 0:
+            yield column, row
             return
-
+        for dx in range(-ring, ring + 1):
+            yield column + dx, row - ring
+            yield column + dx, row + ring
+        for dy in range(-ring + 1, ring):
+            yield column - ring, row + dy
+            yield column + ring, row + dy
+
+    def within(self, left, top, right, bottom):
+        """Yield the food in the cells left <= x < right, top <= y < bottom."""
+        for column in range(left // self.bucket, (right - 1) // self.bucket + 1):
+            for row in range(top // self.bucket, (bottom - 1) // self.bucket + 1):
+                for food in self.buckets.get((column, row), ()):
+                    if left <= food[0] < right and top <= food[1] < bottom:
+                        yield food
+
+# --- Controllers ---
+class Budget:
+    """Per-tick allowance of expanded cells and, optionally, wall-clock time."""
+
+    def __init__(self, nodes=AI_NODE_BUDGET, seconds=AI_TIME_BUDGET):
+        self.nodes = nodes
+        self.deadline = None if seconds is None else time.perf_counter() + seconds
+
+    def spend(self, nodes=1):
+        """Use up `nodes` expansions; returns False once the budget is gone."""
+        self.nodes -= nodes
+        if self.nodes < 0:
+            return False
+        # Checking the clock is comparatively slow, so only do it every 64 cells
+        if self.deadline is not None and self.nodes % 64 == 0:
+            return time.perf_counter() < self.deadline
+        return True
+
+class GreedyController:
+    """Step to whichever free neighbor is closest to the nearest food (Manhattan distance)."""
+
+    def choose_direction(self, snake, foods, obstacles):
+        food = foods.nearest(snake.get_head())
         best_direction = None
         best_distance = float('inf')
 
         # Try each direction and choose the one that minimizes distance to food
-        random.shuffle(DIRECTIONS)  # randomize tie-breakers
-        for d in DIRECTIONS:
-            new_head = add_tuples(self.get_head(), d)
+        directions = DIRECTIONS[:]
+        snake.rng.shuffle(directions)  # randomize tie-breakers
+        for d in directions:
+            new_head = add_tuples(snake.get_head(), d)
             # Check for wall collisions (board boundaries)
-            if new_head[0] < 0 or new_head[0] >= GRID_WIDTH or new_head[1] < 0 or new_head[1] >= GRID_HEIGHT:
+            if not obstacles.in_bounds(new_head):
                 continue
             # Check if new_head would hit obstacles (self or other snake segments)
             if new_head in obstacles:
                 continue
-            dist = manhattan_distance(new_head, food)
+            # With no food on the board (it is full) any safe move will do
+            dist = manhattan_distance(new_head, food) if food is not None else 0
             if dist < best_distance:
                 best_distance = dist
                 best_direction = d
+        return best_direction
+
+class PathController:
+    """Follow a shortest path to a food, avoiding moves into dead ends.
+
+    The target is the nearest food, kept until it is eaten. The path is
+    cached and only replanned when the target changes or a cell on the
+    remaining path becomes occupied. Before taking a step, a flood fill
+    checks that the region it leads into has room for the whole snake; if
+    not (or no path exists), the snake heads for the roomiest neighbor.
+    Searches share one Budget per tick and fall back to a cheaper choice
+    when it runs out.
+    """
+
+    def __init__(self, node_budget=AI_NODE_BUDGET, time_budget=AI_TIME_BUDGET):
+        self.node_budget = node_budget
+        self.time_budget = time_budget
+        self.path = deque()
+        self.target = None
+        self.replans = 0
+
+    def _free_neighbors(self, pos, obstacles):
+        for d in DIRECTIONS:
+            cell = add_tuples(pos, d)
+            if obstacles.in_bounds(cell) and cell not in obstacles:
+                yield d, cell
+
+    def _path_is_valid(self, snake, food, obstacles):
+        if not self.path or food != self.target:
+            return False
+        if manhattan_distance(snake.get_head(), self.path[0]) != 1:
+            return False
+        return all(cell not in obstacles for cell in self.path)
+
+    # The searches below work on flat cell indices straight off the occupancy
+    # bytearray; they run thousands of times per tick, so tuples are too slow.
+    def _open_cells(self, i, obstacles):
+        width, cells = obstacles.width, obstacles.cells
+        x = i % width
+        if i >= width and not cells[i - width]:
+            yield i - width
+        if i + width < len(cells) and not cells[i + width]:
+            yield i + width
+        if x > 0 and not cells[i - 1]:
+            yield i - 1
+        if x < width - 1 and not cells[i + 1]:
+            yield i + 1
+
+    def _plan(self, start, food, obstacles, budget):
+        """A* search from start to food; returns a deque of cells or None.
+
+        The Manhattan-distance heuristic keeps paths shortest while heading
+        straight for the food across open ground, so a far food on a big
+        board costs about its distance in expansions, not the area around it.
+        """
+        width = obstacles.width
+        goal_x, goal_y = food
+        start = start[1] * width + start[0]
+        goal = goal_y * width + goal_x
+        parents = {start: None}
+        costs = {start: 0}
+        # Entries are (cost + heuristic, -cost, cell): among equals, expand the deepest first
+        frontier = [(0, 0, start)]
+        while frontier:
+            _, cost, i = heapq.heappop(frontier)
+            if i == goal:
+                path = deque()
+                while i != start:
+                    path.appendleft((i % width, i // width))
+                    i = parents[i]
+                return path
+            cost = -cost
+            if cost > costs[i]:
+                continue  # Already expanded by a shorter route
+            if not budget.spend():
+                return None
+            for j in self._open_cells(i, obstacles):
+                if cost + 1 < costs.get(j, cost + 2):
+                    costs[j] = cost + 1
+                    parents[j] = i
+                    estimate = cost + 1 + abs(j % width - goal_x) + abs(j // width - goal_y)
+                    heapq.heappush(frontier, (estimate, -cost - 1, j))
+        return None
+
+    def _room(self, start, limit, obstacles, budget):
+        """Count free cells reachable from start, stopping early at limit."""
+        start = start[1] * obstacles.width + start[0]
+        seen = {start}
+        frontier = [start]
+        while frontier and len(seen) < limit:
+            if not budget.spend():
+                break
+            for j in self._open_cells(frontier.pop(), obstacles):
+                if j not in seen:
+                    seen.add(j)
+                    frontier.append(j)
+        return len(seen)
+
+    def choose_direction(self, snake, foods, obstacles):
+        budget = Budget(self.node_budget, self.time_budget)
+        head = snake.get_head()
+        needed = len(snake.positions) + 1
+        food = self.target if self.target in foods else foods.nearest(head)
+
+        if food is not None and not self._path_is_valid(snake, food, obstacles):
+            self.replans += 1
+            self.target = food
+            self.path = self._plan(head, food, obstacles, budget) or deque()
+
+        if self.path:
+            step = self.path[0]
+            if self._room(step, needed, obstacles, budget) >= needed:
+                self.path.popleft()
+                return (step[0] - head[0], step[1] - head[1])
+            # The path leads into a pocket that is too small; drop it
+            self.path.clear()
+
+        # No safe path: move toward the most open neighbor, nearest the food on ties
+        best_direction = None
+        best_key = None
+        directions = DIRECTIONS[:]
+        snake.rng.shuffle(directions)  # randomize tie-breakers
+        for d, cell in self._free_neighbors(head, obstacles):
+            room = self._room(cell, needed, obstacles, budget)
+            dist = manhattan_distance(cell, food) if food is not None else 0
+            key = (-room, dist, directions.index(d))
+            if best_key is None or key < best_key:
+                best_key = key
+                best_direction = d
+        return best_direction
+
+CONTROLLERS = {
+    "greedy": GreedyController,
+    "path": PathController,
+}
+
+# --- Snake Class ---
+class Snake:
+    def __init__(self, init_positions, color, rng=random, occupancy=None, controller=None, index=0):
+        self.rng = rng
+        self.controller = controller if controller is not None else GreedyController()
+        self.occupancy = occupancy if occupancy is not None else Occupancy()
+        self.owner = index + 1  # How the occupancy grid marks this snake's cells
+        self.positions = deque(init_positions)  # head is first element
+        for pos in self.positions:
+            self.occupancy.add(pos, self.owner)
+        self.direction = rng.choice(DIRECTIONS)
+        self.color = color
+        self.alive = True
+        self.score = len(init_positions)  # starting score is initial length
+
+    def get_head(self):
+        return self.positions[0]
+
+    def move(self, foods, obstacles, direction=None):
+        """Advance the head one cell as the controller decides, unless a direction is forced."""
+        if not self.alive:
+            return
+        if direction == STUCK:
+            self.alive = False
+            return
+        if direction is not None:
+            self.direction = direction
+            self.push_head(add_tuples(self.get_head(), direction))
+            return
+
+        best_direction = self.controller.choose_direction(self, foods, obstacles)
 
         # If no valid direction is found, try to continue in the current direction if possible
         if best_direction is None:
             new_head = add_tuples(self.get_head(), self.direction)
-            if (0 <= new_head[0] < GRID_WIDTH and 0 <= new_head[1] < GRID_HEIGHT and
-                new_head not in obstacles):
+            if obstacles.in_bounds(new_head) and new_head not in obstacles:
                 best_direction = self.direction
             else:
                 # Snake is trapped
@@ -87,128 +455,388 @@ class Snake:
                 return
 
         self.direction = best_direction
-        new_head = add_tuples(self.get_head(), self.direction)
-        self.positions.insert(0, new_head)
+        self.push_head(add_tuples(self.get_head(), self.direction))
+
+    def push_head(self, pos):
+        self.positions.appendleft(pos)
+        self.occupancy.add(pos, self.owner)
 
     def trim_tail(self):
         # Remove last segment (simulate movement)
-        self.positions.pop()
-
-    def check_self_collision(self):
-        # Check if the head collides with its own body
-        return self.get_head() in self.positions[1:]
-
-# --- Main Game Function ---
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    pygame.display.set_caption("Snake Game with 2 Computer Controlled Snakes")
-    clock = pygame.time.Clock()
-    font = pygame.font.SysFont("Arial", 24)
-
-    # Initialize snakes with different starting positions
-    snake1 = Snake(init_positions=[(5, 5)], color=GREEN)
-    snake2 = Snake(init_positions=[(GRID_WIDTH - 6, GRID_HEIGHT - 6)], color=BLUE)
-
-    # Place initial food (avoid snake positions)
-    occupied = set(snake1.positions + snake2.positions)
-    food = get_random_position(occupied)
-
-    running = True
-    while running:
-        clock.tick(FPS)
-
-        # Process events (only allow quitting)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
-        # Move snakes if they are alive
-        for snake in (snake1, snake2):
-            if snake.alive:
-                # Build obstacles set from both snakes (all segments)
-                obstacles = set(snake1.positions) | set(snake2.positions)
-                # Exclude snake's current head from obstacles so it can move from there
-                snake.move(food, obstacles - {snake.get_head()})
+        self.occupancy.remove(self.positions.pop())
+
+    def check_collision(self):
+        # The head shares its cell with another segment (its own body or another snake)
+        return self.occupancy.count(self.get_head()) > 1
+
+# --- Simulation ---
+class SnakeBoard:
+    """One match between computer snakes, with no drawing; the renderer only observes it.
+
+    Every query a tick makes is O(1) or bounded: collisions are counts in
+    the shared Occupancy grid, eating is a lookup in the FoodIndex, and each
+    controller works within its own budget. So a tick costs roughly the same
+    per snake however many snakes and however big the board.
+    """
+
+    def __init__(self, seed=None, controllers=None, snakes=NUM_SNAKES, width=BOARD_WIDTH, height=BOARD_HEIGHT,
+                 foods=FOOD_COUNT):
+        # One controller name or factory per snake, e.g. ("path", GreedyController), reused in turn
+        self.controllers = controllers or (SNAKE_AI,)
+        self.num_snakes = snakes
+        self.width, self.height = width, height
+        self.food_count = foods
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        # Food comes from `rng` and the controllers' tie-breaks from `ai_rng`, so
+        # replaying recorded moves without the controllers places the same food
+        self.rng = random.Random(seed)
+        self.ai_rng = random.Random(self.rng.getrandbits(64))
+        # Initialize snakes with different starting positions
+        self._add_snakes([[pos] for pos in start_positions(self.num_snakes, self.width, self.height)])
+        # Place initial food (avoid snake positions)
+        self.foods = FoodIndex(self.width, self.height)
+        self._top_up_food()
+        self.ticks = 0
+        self.moves = [None] * len(self.snakes)  # The direction each snake moved last tick
+
+    def _add_snakes(self, bodies):
+        self.occupancy = Occupancy(self.width, self.height)
+        make = [CONTROLLERS.get(c, c) if isinstance(c, str) else c for c in self.controllers]
+        self.snakes = [
+            Snake(init_positions=body, color=snake_color(i), rng=self.ai_rng, occupancy=self.occupancy,
+                  controller=make[i % len(make)](), index=i)
+            for i, body in enumerate(bodies)
+        ]
+
+    def _place_food(self):
+        """Put a food on a random cell with neither a snake nor food; False if none was found."""
+        for _ in range(FOOD_PLACEMENT_TRIES):
+            pos = get_random_position(self.occupancy, self.rng)
+            if pos is None:
+                return False
+            if pos not in self.foods:
+                self.foods.add(pos)
+                return True
+        return False
+
+    def _top_up_food(self):
+        while len(self.foods) < self.food_count and self._place_food():
+            pass
+
+    @property
+    def done(self):
+        return not any(snake.alive for snake in self.snakes)
+
+    def step(self, directions=None):
+        """Advance one tick. `directions` optionally forces each snake's move.
+
+        Afterwards `moves` holds the direction each snake took (STUCK if it
+        had none, None if it was already dead); passing that back in
+        replays the tick without asking the controllers.
+        """
+        self.ticks += 1
+        directions = directions or [None] * len(self.snakes)
+
+        # Move snakes if they are alive; the shared occupancy grid is the obstacle set
+        self.moves = []
+        with PROFILER.scope("move"):
+            for snake, direction in zip(self.snakes, directions):
+                if snake.alive:
+                    snake.move(self.foods, self.occupancy, direction)
+                    self.moves.append(snake.direction if snake.alive else STUCK)
+                else:
+                    self.moves.append(None)
 
         # Check collisions for each snake
-        for snake in (snake1, snake2):
+        for snake in self.snakes:
             head = snake.get_head()
             # Wall collision
-            if head[0] < 0 or head[0] >= GRID_WIDTH or head[1] < 0 or head[1] >= GRID_HEIGHT:
+            if not self.occupancy.in_bounds(head):
                 snake.alive = False
-            # Self collision
-            if snake.check_self_collision():
+            # Collision with its own body or another snake, head-on included
+            if snake.check_collision():
                 snake.alive = False
 
-        # Check for snake collisions with the other snake
-        if snake1.get_head() in snake2.positions:
-            snake1.alive = False
-        if snake2.get_head() in snake1.positions:
-            snake2.alive = False
-
-        # Check if any snake ate the food
-        ate_food = False
-
-        for snake in (snake1, snake2):
-            if snake.alive and snake.get_head() == food:
-                # Snake grows: do not trim tail this round and increase score
+        # Snakes whose heads reached food grow: their tails are not trimmed this round
+        eaten = set()
+        for snake in self.snakes:
+            if snake.alive and snake.get_head() in self.foods:
                 snake.score += 1
-                ate_food = snake
+                eaten.add(snake)
+                self.foods.remove(snake.get_head())
                 # Place new food (avoid all snake segments)
-                occupied = set(snake1.positions + snake2.positions)
-                food = get_random_position(occupied)
-                break  # Only one snake can eat the food per update
+                self._place_food()
 
         # For snakes that did not eat, trim tail to simulate movement
-        for snake in (snake1, snake2):
-            if snake.alive and not (snake == ate_food):
+        for snake in self.snakes:
+            if snake.alive and snake not in eaten:
                 snake.trim_tail()
 
-        # --- Drawing ---
-        # Clear screen (fill with black)
-        screen.fill(BLACK)
-
-        # Draw scoreboard background
-        scoreboard_rect = pygame.Rect(0, 0, WINDOW_WIDTH, SCOREBOARD_HEIGHT)
-        pygame.draw.rect(screen, GRAY, scoreboard_rect)
-
-        # Render scoreboard text
+        # If the board was too full when food was last placed, retry now tails have moved
+        self._top_up_food()
+
+    def snapshot(self):
+        """Return the board as plain data; controllers and their tie-breaks start afresh on restore."""
+        return {
+            "rng": self.rng.getstate(),
+            "ticks": self.ticks,
+            "size": (self.width, self.height),
+            "food_count": self.food_count,
+            "foods": list(self.foods),
+            "snakes": [(list(snake.positions), snake.direction, snake.alive, snake.score)
+                       for snake in self.snakes],
+        }
+
+    def restore(self, state):
+        self.width, self.height = state["size"]
+        self.food_count = state["food_count"]
+        self._add_snakes([positions for positions, _, _, _ in state["snakes"]])
+        self.num_snakes = len(self.snakes)
+        for snake, (_, direction, alive, score) in zip(self.snakes, state["snakes"]):
+            snake.direction, snake.alive, snake.score = direction, alive, score
+        self.rng.setstate(state["rng"])
+        self.ticks = state["ticks"]
+        self.foods = FoodIndex(self.width, self.height)
+        for food in state["foods"]:
+            self.foods.add(food)
+        self.moves = [None] * len(self.snakes)
+
+    def observe(self):
+        return {
+            "snakes": [list(snake.positions) for snake in self.snakes],
+            "alive": [snake.alive for snake in self.snakes],
+            "scores": [snake.score for snake in self.snakes],
+            "foods": list(self.foods),
+        }
+
+class SnakeEnv:
+    """Step N independent boards in lockstep with reset/step semantics.
+
+    Board i is seeded with seed + i, so a run is fully determined by the
+    seed and the actions passed to step(). `snakes`, `width`, `height` and
+    `foods` size every board, as for SnakeBoard.
+    """
+
+    def __init__(self, num_boards=1, seed=0, max_ticks=MAX_TICKS, controllers=None, snakes=NUM_SNAKES,
+                 width=BOARD_WIDTH, height=BOARD_HEIGHT, foods=FOOD_COUNT):
+        self.num_boards = num_boards
+        self.max_ticks = max_ticks
+        self.boards = [SnakeBoard(controllers=controllers, snakes=snakes, width=width, height=height, foods=foods)
+                       for _ in range(num_boards)]
+        self.reset(seed)
+
+    def reset(self, seed=0):
+        for i, board in enumerate(self.boards):
+            board.reset(seed + i)
+        return [board.observe() for board in self.boards]
+
+    def step(self, actions=None):
+        """Advance every unfinished board one tick.
+
+        `actions` is an optional list with one tuple of directions, one per
+        snake (or None), per board; None lets the built-in AI steer. Returns
+        (observations, rewards, dones), where rewards are per-snake score gains.
+        """
+        observations, rewards, dones = [], [], []
+        for i, board in enumerate(self.boards):
+            before = [snake.score for snake in board.snakes]
+            if not self.is_done(board):
+                board.step(actions and actions[i])
+            observations.append(board.observe())
+            rewards.append([snake.score - score for snake, score in zip(board.snakes, before)])
+            dones.append(self.is_done(board))
+        return observations, rewards, dones
+
+    def is_done(self, board):
+        return board.done or board.ticks >= self.max_ticks
+
+# --- Batch Self-play ---
+def play_match(seed, max_ticks=MAX_TICKS, controllers=None, snakes=NUM_SNAKES, width=BOARD_WIDTH,
+               height=BOARD_HEIGHT, foods=FOOD_COUNT):
+    """Play one headless match and return its final scores and length."""
+    board = SnakeBoard(seed, controllers, snakes, width, height, foods)
+    while not board.done and board.ticks < max_ticks:
+        board.step()
+    return {"seed": seed, "scores": [snake.score for snake in board.snakes], "ticks": board.ticks}
+
+def run_matches(seeds, workers=None, max_ticks=MAX_TICKS, controllers=None, snakes=NUM_SNAKES,
+                width=BOARD_WIDTH, height=BOARD_HEIGHT, foods=FOOD_COUNT):
+    """Play one match per seed across a process pool and summarize the scores."""
+    with Pool(workers) as pool:
+        results = pool.starmap(play_match, [(seed, max_ticks, controllers, snakes, width, height, foods)
+                                            for seed in seeds])
+    return summarize_matches(results), results
+
+def summarize_matches(results):
+    """Aggregate score statistics and win counts per snake index over many matches.
+
+    `summary["snakes"][i]` describes snake i (0 is green, 1 is blue). A
+    snake wins a match by outscoring every other snake; ties win nothing.
+    """
+    summary = {"matches": len(results), "mean_ticks": statistics.fmean(r["ticks"] for r in results),
+               "snakes": []}
+    for i in range(len(results[0]["scores"])):
+        scores = [r["scores"][i] for r in results]
+        summary["snakes"].append({
+            "mean": statistics.fmean(scores),
+            "stdev": statistics.pstdev(scores),
+            "min": min(scores),
+            "max": max(scores),
+            "wins": sum(score > max(r["scores"][:i] + r["scores"][i + 1:], default=-1)
+                        for score, r in zip(scores, results)),
+        })
+    return summary
+
+# --- Rendering ---
+class Camera:
+    """The window's view onto the board, in cells, scrolled with the arrow keys."""
+
+    def __init__(self, board_width, board_height, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.board_width, self.board_height = board_width, board_height
+        self.width, self.height = min(width, board_width), min(height, board_height)
+        self.left = self.top = 0
+
+    @property
+    def right(self):
+        return self.left + self.width
+
+    @property
+    def bottom(self):
+        return self.top + self.height
+
+    def scroll(self, dx, dy):
+        self.left = max(0, min(self.left + dx, self.board_width - self.width))
+        self.top = max(0, min(self.top + dy, self.board_height - self.height))
+
+    def contains(self, pos):
+        return self.left <= pos[0] < self.right and self.top <= pos[1] < self.bottom
+
+    def to_screen(self, pos):
+        """Return the screen rect of a board cell."""
+        return pygame.Rect((pos[0] - self.left) * CELL_SIZE, (pos[1] - self.top) * CELL_SIZE + SCOREBOARD_HEIGHT,
+                           CELL_SIZE, CELL_SIZE)
+
+def draw_board(screen, font, board, camera=None):
+    """Draw the scoreboard and the part of a SnakeBoard the camera sees.
+
+    Snake cells are colored straight from the occupancy grid's owners within
+    the view, so the cost depends on the window size, not on how many snakes
+    there are or how long they grow.
+    """
+    if camera is None:
+        camera = Camera(board.width, board.height)
+
+    # Clear screen (fill with black)
+    screen.fill(BLACK)
+
+    # Draw scoreboard background
+    scoreboard_rect = pygame.Rect(0, 0, WINDOW_WIDTH, SCOREBOARD_HEIGHT)
+    pygame.draw.rect(screen, GRAY, scoreboard_rect)
+
+    # Render scoreboard text
+    if len(board.snakes) == 2:
+        snake1, snake2 = board.snakes
         score_text1 = font.render(f"Green Snake Score: {snake1.score}", True, WHITE)
         score_text2 = font.render(f"Blue Snake Score: {snake2.score}", True, WHITE)
-        screen.blit(score_text1, (10, 5))
-        screen.blit(score_text2, (WINDOW_WIDTH - score_text2.get_width() - 10, 5))
-
-        # Draw playing area background (below scoreboard)
-        play_area = pygame.Rect(0, SCOREBOARD_HEIGHT, WINDOW_WIDTH, WINDOW_HEIGHT - SCOREBOARD_HEIGHT)
-        pygame.draw.rect(screen, BLACK, play_area)
-
-        # Draw food (adjust y coordinate by SCOREBOARD_HEIGHT)
-        food_rect = pygame.Rect(food[0] * CELL_SIZE, food[1] * CELL_SIZE + SCOREBOARD_HEIGHT, CELL_SIZE, CELL_SIZE)
-        pygame.draw.rect(screen, YELLOW, food_rect)
-
-        # Draw snakes (adjust y coordinate by SCOREBOARD_HEIGHT)
-        for snake in (snake1, snake2):
-            for pos in snake.positions:
-                rect = pygame.Rect(pos[0] * CELL_SIZE, pos[1] * CELL_SIZE + SCOREBOARD_HEIGHT, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(screen, snake.color, rect)
-            # Optionally, mark the head with a white border if alive
-            if snake.alive:
-                head_rect = pygame.Rect(snake.get_head()[0] * CELL_SIZE,
-                                        snake.get_head()[1] * CELL_SIZE + SCOREBOARD_HEIGHT,
-                                        CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(screen, WHITE, head_rect, 2)
-
-        # If both snakes are dead, display Game Over message centered in the play area
-        if not snake1.alive and not snake2.alive:
-            game_over_text = font.render("Game Over!", True, RED)
-            text_rect = game_over_text.get_rect(center=(WINDOW_WIDTH//2, (WINDOW_HEIGHT + SCOREBOARD_HEIGHT)//2))
-            screen.blit(game_over_text, text_rect)
-
-        pygame.display.flip()
+    else:
+        alive = sum(snake.alive for snake in board.snakes)
+        score_text1 = font.render(f"Snakes Alive: {alive}/{len(board.snakes)}", True, WHITE)
+        score_text2 = font.render(f"Top Score: {max(snake.score for snake in board.snakes)}", True, WHITE)
+    screen.blit(score_text1, (10, 5))
+    screen.blit(score_text2, (WINDOW_WIDTH - score_text2.get_width() - 10, 5))
+
+    # Draw snakes: look up each visible cell's owner in a color table, one pixel per cell, then scale up
+    colors = np.array([BLACK] + [snake.color for snake in board.snakes], dtype=np.uint8)
+    occupancy = board.occupancy
+    owners = np.frombuffer(occupancy.owners, dtype=np.int32).reshape(occupancy.height, occupancy.width)
+    view = colors[owners[camera.top:camera.bottom, camera.left:camera.right]]
+    cells = pygame.surfarray.make_surface(view.swapaxes(0, 1))
+    screen.blit(pygame.transform.scale(cells, (camera.width * CELL_SIZE, camera.height * CELL_SIZE)),
+                (0, SCOREBOARD_HEIGHT))
+
+    # Draw food in view; there is none on a full board
+    for food in board.foods.within(camera.left, camera.top, camera.right, camera.bottom):
+        pygame.draw.rect(screen, YELLOW, camera.to_screen(food))
+
+    # Mark the heads of live snakes in view with a white border
+    for snake in board.snakes:
+        if snake.alive and camera.contains(snake.get_head()):
+            pygame.draw.rect(screen, WHITE, camera.to_screen(snake.get_head()), 2)
+
+    # If every snake is dead, display Game Over message centered in the play area
+    if board.done:
+        game_over_text = font.render("Game Over!", True, RED)
+        text_rect = game_over_text.get_rect(center=(WINDOW_WIDTH//2, (WINDOW_HEIGHT + SCOREBOARD_HEIGHT)//2))
+        screen.blit(game_over_text, text_rect)
+
+# --- Main Game Function ---
+SCROLL_KEYS = {pygame.K_UP: UP, pygame.K_DOWN: DOWN, pygame.K_LEFT: LEFT, pygame.K_RIGHT: RIGHT}
+
+def main(fps=FPS, max_frames=None, seed=None, record=None, snakes=NUM_SNAKES, width=BOARD_WIDTH,
+         height=BOARD_HEIGHT, foods=FOOD_COUNT, capture=None):
+    """Run the game. fps=0 disables the frame cap; max_frames stops after that many frames.
 
+    `record` is a path to write a replay log of the session to (see replay.py).
+    `capture` is a video or PNG path to stream the frames to (see capture.py).
+    `snakes`, `width`, `height` and `foods` size the match; on boards bigger
+    than the window the arrow keys scroll the view.
+    """
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption(f"Snake Game with {snakes} Computer Controlled Snakes")
+    pygame.key.set_repeat(200, 50)
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont("Arial", 24)
+
+    board = SnakeBoard(seed, snakes=snakes, width=width, height=height, foods=foods)
+    camera = Camera(width, height)
+    recorder = replay.Recorder(record, "dual_snake", board, seed) if record else None
+    capturer = FrameCapture(capture, screen.get_size(), fps or CAPTURE_FPS) if capture else None
+
+    running = True
+    frames = 0
+    while running:
+        clock.tick(fps)
+
+        # Process events (quitting, scrolling the view and the profiling overlay)
+        with PROFILER.scope("events"):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key == OVERLAY_KEY:
+                    PROFILER.toggle_overlay()
+                elif event.type == pygame.KEYDOWN and event.key in SCROLL_KEYS:
+                    dx, dy = SCROLL_KEYS[event.key]
+                    camera.scroll(dx * SCROLL_STEP, dy * SCROLL_STEP)
+
+        with PROFILER.scope("simulate"):
+            board.step()
+        if recorder:
+            recorder.record(board.moves)
+
+        # --- Drawing ---
+        with PROFILER.scope("render"):
+            draw_board(screen, font, board, camera)
+            if PROFILER.show_overlay:
+                PROFILER.draw(screen)
+            pygame.display.flip()
+        if capturer:
+            with PROFILER.scope("capture"):
+                capturer.capture(screen)
+
+        frames += 1
+        if max_frames is not None and frames >= max_frames:
+            running = False
+
+    if recorder:
+        recorder.close()
+    if capturer:
+        capturer.close()
     pygame.quit()
-    sys.exit()
+    return frames
 
 if __name__ == "__main__":
     main()
+    sys.exit()
@@ -0,0 +1,268 @@
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+# --- Configuration ---
+MAX_NODES = 2_000_000     # Canonical node table size before LRU eviction
+MAX_RESULTS = 1_000_000   # Memoized successor results before LRU eviction
+
+
+# --- Quadtree Node ---
+class Node:
+    """An immutable quadtree macro-cell of 2**level x 2**level cells."""
+    __slots__ = ("nw", "ne", "sw", "se", "level", "population")
+
+    def __init__(self, nw, ne, sw, se, level, population):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+
+
+OFF = Node(None, None, None, None, 0, 0)
+ON = Node(None, None, None, None, 0, 1)
+
+
+# --- Hashlife Engine ---
+class HashLife:
+    """Hashlife engine for Conway's Game of Life on an unbounded plane.
+
+    Nodes are canonicalized through a hash-consing table so identical regions
+    share one node, and successor results are memoized per (node, step). Both
+    tables are bounded and evict least-recently-used entries. A root node of
+    level k covers the square from -2**(k-1) to 2**(k-1) on both axes, so the
+    origin stays at the center as the universe grows and shrinks.
+    """
+
+    def __init__(self, max_nodes=MAX_NODES, max_results=MAX_RESULTS):
+        self.max_nodes = max_nodes
+        self.max_results = max_results
+        self.clear()
+
+    def clear(self):
+        """Drop every cached node and result, and reset the statistics."""
+        self._nodes = OrderedDict()
+        self._results = OrderedDict()
+        self._empty = [OFF]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --- Node construction ---
+    def join(self, nw, ne, sw, se):
+        """Return the canonical node with the given four quadrants."""
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is not None:
+            self._nodes.move_to_end(key)
+            return node
+        node = Node(nw, ne, sw, se, nw.level + 1,
+                    nw.population + ne.population + sw.population + se.population)
+        self._nodes[key] = node
+        if len(self._nodes) > self.max_nodes:
+            # Evicted nodes stay valid while referenced; they just stop being shared
+            self._nodes.popitem(last=False)
+            self.evictions += 1
+        return node
+
+    def empty(self, level):
+        """Return an empty node of the given level."""
+        while len(self._empty) <= level:
+            e = self._empty[-1]
+            self._empty.append(self.join(e, e, e, e))
+        return self._empty[level]
+
+    def centre(self, node):
+        """Return a node one level up with `node` in the middle and an empty border."""
+        e = self.empty(node.level - 1)
+        return self.join(
+            self.join(e, e, e, node.nw),
+            self.join(e, e, node.ne, e),
+            self.join(e, node.sw, e, e),
+            self.join(node.se, e, e, e),
+        )
+
+    def _inner(self, node):
+        """Return the central node one level down."""
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def _is_padded(self, node):
+        """True if every live cell sits in the central quarter-width block."""
+        if node.level < 3:
+            return False
+        inner = (node.nw.se.se.population + node.ne.sw.sw.population +
+                 node.sw.ne.ne.population + node.se.nw.nw.population)
+        return inner == node.population
+
+    # --- Evolution ---
+    def _life_4x4(self, node):
+        """Advance a level-2 node one generation and return its 2x2 center."""
+        rows = [
+            [node.nw.nw, node.nw.ne, node.ne.nw, node.ne.ne],
+            [node.nw.sw, node.nw.se, node.ne.sw, node.ne.se],
+            [node.sw.nw, node.sw.ne, node.se.nw, node.se.ne],
+            [node.sw.sw, node.sw.se, node.se.sw, node.se.se],
+        ]
+        cells = [[c.population for c in row] for row in rows]
+        result = []
+        for i in (1, 2):
+            for j in (1, 2):
+                total = sum(cells[y][x] for y in (i-1, i, i+1) for x in (j-1, j, j+1)) - cells[i][j]
+                alive = total == 3 or (cells[i][j] and total == 2)
+                result.append(ON if alive else OFF)
+        return self.join(*result)
+
+    def successor(self, node, j):
+        """Return the center of `node` advanced 2**j generations (j <= level - 2)."""
+        if node.population == 0:
+            return self.empty(node.level - 1)
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return result
+        self.misses += 1
+
+        if node.level == 2:
+            result = self._life_4x4(node)
+        else:
+            join = self.join
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            # Nine overlapping sub-squares, each advanced by 2**j (or 2**(j-1))
+            half = j < node.level - 2
+            step = j if half else j - 1
+            c1 = self.successor(join(nw.nw, nw.ne, nw.sw, nw.se), step)
+            c2 = self.successor(join(nw.ne, ne.nw, nw.se, ne.sw), step)
+            c3 = self.successor(join(ne.nw, ne.ne, ne.sw, ne.se), step)
+            c4 = self.successor(join(nw.sw, nw.se, sw.nw, sw.ne), step)
+            c5 = self.successor(join(nw.se, ne.sw, sw.ne, se.nw), step)
+            c6 = self.successor(join(ne.sw, ne.se, se.nw, se.ne), step)
+            c7 = self.successor(join(sw.nw, sw.ne, sw.sw, sw.se), step)
+            c8 = self.successor(join(sw.ne, se.nw, sw.se, se.sw), step)
+            c9 = self.successor(join(se.nw, se.ne, se.sw, se.se), step)
+            if half:
+                # The full 2**j already happened; just stitch the centers together
+                result = join(
+                    join(c1.se, c2.sw, c4.ne, c5.nw),
+                    join(c2.se, c3.sw, c5.ne, c6.nw),
+                    join(c4.se, c5.sw, c7.ne, c8.nw),
+                    join(c5.se, c6.sw, c8.ne, c9.nw),
+                )
+            else:
+                # Each half covered 2**(j-1); advance the four quadrants again
+                result = join(
+                    self.successor(join(c1, c2, c4, c5), step),
+                    self.successor(join(c2, c3, c5, c6), step),
+                    self.successor(join(c4, c5, c7, c8), step),
+                    self.successor(join(c5, c6, c8, c9), step),
+                )
+
+        self._results[key] = result
+        if len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def step_pow2(self, root, j):
+        """Advance a root node by exactly 2**j generations."""
+        while root.level < j + 3 or not self._is_padded(root):
+            root = self.centre(root)
+        # successor() keeps the center, so the origin stays where it was
+        return self.successor(root, j)
+
+    def advance(self, root, generations):
+        """Advance a root node by any number of generations."""
+        j = 0
+        while generations:
+            if generations & 1:
+                root = self.step_pow2(root, j)
+            generations >>= 1
+            j += 1
+        return self.crop(root)
+
+    def crop(self, root):
+        """Shrink a root node while all live cells fit in its central half."""
+        while root.level > 3 and self._inner(root).population == root.population:
+            root = self._inner(root)
+        return root
+
+    # --- Conversion ---
+    def from_cells(self, cells):
+        """Build a root node from an iterable of live (x, y) coordinates."""
+        cells = list(cells)
+        extent = max((max(-x, x + 1, -y, y + 1) for x, y in cells), default=1)
+        level = 3
+        while (1 << (level - 1)) < extent:
+            level += 1
+        offset = 1 << (level - 1)
+        layer = {(x + offset, y + offset): ON for x, y in cells}
+        # Merge 2x2 blocks bottom-up; absent children are empty nodes
+        for k in range(level):
+            e = self.empty(k)
+            parents = {}
+            for (x, y) in layer:
+                parents.setdefault((x >> 1, y >> 1), None)
+            layer = {
+                (px, py): self.join(
+                    layer.get((2*px, 2*py), e), layer.get((2*px + 1, 2*py), e),
+                    layer.get((2*px, 2*py + 1), e), layer.get((2*px + 1, 2*py + 1), e),
+                )
+                for (px, py) in parents
+            }
+        return layer.get((0, 0), self.empty(level))
+
+    def to_cells(self, root, x0=None, y0=None, width=None, height=None):
+        """Yield live (x, y) coordinates, optionally limited to a window."""
+        half = 1 << root.level >> 1
+        bounds = None if x0 is None else (x0, y0, x0 + width, y0 + height)
+        stack = [(root, -half, -half)]
+        while stack:
+            node, x, y = stack.pop()
+            if node.population == 0:
+                continue
+            size = 1 << node.level
+            if bounds and (x >= bounds[2] or y >= bounds[3] or x + size <= bounds[0] or y + size <= bounds[1]):
+                continue
+            if node.level == 0:
+                yield x, y
+                continue
+            h = size >> 1
+            stack.append((node.nw, x, y))
+            stack.append((node.ne, x + h, y))
+            stack.append((node.sw, x, y + h))
+            stack.append((node.se, x + h, y + h))
+
+    def from_grid(self, grid):
+        """Build a root node from a dense grid centred on the origin."""
+        height, width = grid.shape
+        rows, cols = np.nonzero(grid)
+        return self.from_cells(zip((cols - width // 2).tolist(), (rows - height // 2).tolist()))
+
+    def to_grid(self, root, height, width, dtype=np.int64):
+        """Return the dense window of a root node matching from_grid's placement."""
+        grid = np.zeros((height, width), dtype=dtype)
+        x0, y0 = -(width // 2), -(height // 2)
+        for x, y in self.to_cells(root, x0, y0, width, height):
+            grid[y - y0, x - x0] = 1
+        return grid
+
+    # --- Statistics ---
+    def stats(self):
+        """Return cache hit/miss counts and an estimate of memory in use."""
+        node_bytes = sys.getsizeof(OFF)
+        # Each table entry holds a key tuple plus roughly three dict slots
+        entry_bytes = sys.getsizeof((None,) * 4) + 3 * 8
+        lookups = self.hits + self.misses
+        return {
+            "nodes": len(self._nodes),
+            "results": len(self._results),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_bytes": len(self._nodes) * (node_bytes + entry_bytes) + len(self._results) * entry_bytes,
+        }
@@ -0,0 +1,66 @@
+"""Run any of the games without a window and without frame-rate throttling.
+
+    python headless.py conway --frames 1000
+    python headless.py cannon --profile trace.json   # timing scopes, CSV unless .json
+    python headless.py conway --capture run.mp4      # stream frames to ffmpeg, or PNGs
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+from profiler import PROFILER
+
+GAMES = ["conway", "dual_snake", "cannon"]
+
+
+def use_dummy_display():
+    """Point SDL at its dummy video and audio drivers. Call before importing a game."""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+
+def run_game(name, frames, seed=None, record=None, profile=None, capture=None):
+    """Run a game's main loop headless for `frames` frames; return frames per second.
+
+    `record` is a path to write a replay log to (see replay.py). `profile`
+    is a path to export the run's timing scopes to (see profiler.py).
+    `capture` is a video or PNG path to stream the frames to (see capture.py);
+    frames the encoder cannot keep up with are dropped rather than waited for.
+    """
+    use_dummy_display()
+    game = importlib.import_module(name)
+    if profile:
+        PROFILER.clear()
+        PROFILER.enabled = True
+    start = time.perf_counter()
+    try:
+        count = game.main(fps=0, max_frames=frames, seed=seed, record=record, capture=capture)
+    finally:
+        PROFILER.enabled = False
+    elapsed = time.perf_counter() - start
+    if profile:
+        PROFILER.export(profile)
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("game", choices=GAMES)
+    parser.add_argument("--frames", type=int, default=1000, help="number of frames to run")
+    parser.add_argument("--seed", type=int, help="seed for the game's random numbers")
+    parser.add_argument("--record", metavar="LOG", help="write a replay log of the run")
+    parser.add_argument("--profile", metavar="FILE", help="export timing scopes as CSV, or Chrome trace JSON if FILE ends in .json")
+    parser.add_argument("--capture", metavar="PATH", help="stream frames to a video (via ffmpeg) or a PNG pattern like frames/%%06d.png")
+    args = parser.parse_args()
+    rate = run_game(args.game, args.frames, args.seed, args.record, args.profile, args.capture)
+    print(f"{args.game}: {args.frames} frames at {rate:.1f} frames/sec")
+    if args.profile:
+        for name, stats in PROFILER.summary().items():
+            print(f"  {name:12} p50 {stats['p50']:7.3f}  p95 {stats['p95']:7.3f}  p99 {stats['p99']:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
+    sys.exit()
@@ -0,0 +1,139 @@
+import atexit
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# --- Configuration ---
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+
+# --- Worker Process ---
+def _step_band(src, dst, start, stop):
+    """Write rows [start, stop) of the next generation of `src` into `dst`."""
+    height = src.shape[0]
+    # One-row halos from the neighboring bands, wrapping at the top and bottom
+    above = src[(start - 1) % height]
+    below = src[stop % height]
+    band = src[start:stop]
+
+    rows = band.copy()
+    rows[1:] += band[:-1]
+    rows[0] += above
+    rows[:-1] += band[1:]
+    rows[-1] += below
+    # Sum of the 3x3 block minus the cell itself
+    total = np.roll(rows, 1, axis=1) + rows + np.roll(rows, -1, axis=1) - band
+    dst[start:stop] = (total == 3) | ((band == 1) & (total == 2))
+
+
+def _worker(names, shape, start, stop, barrier, state):
+    """Step one row band per generation until asked to stop."""
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    buffers = [np.ndarray(shape, dtype=np.uint8, buffer=block.buf) for block in blocks]
+    try:
+        while True:
+            barrier.wait()  # Wait for the next generation to be requested
+            if state[1]:
+                break
+            current = state[0]
+            _step_band(buffers[current], buffers[1 - current], start, stop)
+            barrier.wait()  # Report the band as finished
+    finally:
+        del buffers
+        for block in blocks:
+            block.close()
+
+
+# --- Parallel Engine ---
+class ParallelLife:
+    """Step a toroidal Life grid across worker processes.
+
+    The grid is split into horizontal row bands, one per worker. Two boards
+    live in shared memory and swap roles every generation, so stepping never
+    copies the grid; each worker reads its band plus one halo row above and
+    below from the current board and writes the band into the other one.
+    """
+
+    def __init__(self, grid, workers=DEFAULT_WORKERS):
+        height, width = grid.shape
+        self.shape = (height, width)
+        self.workers = max(1, min(workers, height))
+        self._blocks = [shared_memory.SharedMemory(create=True, size=height * width) for _ in range(2)]
+        self._buffers = [np.ndarray(self.shape, dtype=np.uint8, buffer=block.buf) for block in self._blocks]
+        # state[0] is the index of the current board, state[1] asks workers to exit
+        self._state = mp.Array("i", [0, 0], lock=False)
+        self._barrier = mp.Barrier(self.workers + 1)
+        self.load(grid)
+
+        bounds = np.linspace(0, height, self.workers + 1).astype(int)
+        names = [block.name for block in self._blocks]
+        self._processes = [
+            mp.Process(target=_worker, args=(names, self.shape, start, stop, self._barrier, self._state), daemon=True)
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+        for process in self._processes:
+            process.start()
+
+    @property
+    def grid(self):
+        """The current generation, as a view into shared memory."""
+        return self._buffers[self._state[0]]
+
+    def load(self, grid):
+        """Replace the current generation with `grid`."""
+        self.grid[:] = grid
+
+    def step(self, generations=1):
+        """Advance the grid in place and return the current generation."""
+        for _ in range(generations):
+            self._barrier.wait()  # Start the workers
+            self._barrier.wait()  # Wait for every band to finish
+            self._state[0] = 1 - self._state[0]
+        return self.grid
+
+    def close(self):
+        """Stop the workers and release the shared memory."""
+        if not self._processes:
+            return
+        self._state[1] = 1
+        self._barrier.wait()
+        for process in self._processes:
+            process.join()
+        self._processes = []
+        del self._buffers
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Step Engine ---
+_engine = None
+
+def _close_engine():
+    if _engine is not None:
+        _engine.close()
+
+atexit.register(_close_engine)
+
+def step_parallel(grid, workers=DEFAULT_WORKERS):
+    """Compute the next generation with a shared ParallelLife engine.
+
+    The returned array is a view into shared memory that a later call will
+    overwrite; copy it to keep it. Passing that same array back in continues
+    from it without copying.
+    """
+    global _engine
+    if _engine is None or _engine.shape != grid.shape or _engine.workers != max(1, min(workers, grid.shape[0])):
+        _close_engine()
+        _engine = ParallelLife(grid, workers)
+    elif grid is not _engine.grid:
+        _engine.load(grid)
+    return _engine.step()
@@ -0,0 +1,186 @@
+import re
+
+import numpy as np
+
+# --- Configuration ---
+CHUNK_SIZE = 1 << 20  # Bytes of pattern text parsed at a time
+
+_RLE_HEADER = re.compile(rb"x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*(\S+))?", re.IGNORECASE)
+
+# RLE body bytes: run counts, then b/. (dead), o or A-X (states 1-24), a p-y
+# prefix for states past 24, $ (end of row) and ! (end of pattern)
+_DIGITS = b"0123456789"
+_PREFIXES = b"pqrstuvwxy"
+_RLE_BYTES = _DIGITS + _PREFIXES + b"bo.$!" + bytes(range(ord("A"), ord("X") + 1))
+_RLE_IGNORED = bytes(c for c in range(256) if c not in _RLE_BYTES)  # Whitespace and stray text
+_ROW_END, _PATTERN_END = -1, -2
+_TAG_STATE = np.zeros(256, dtype=np.int64)  # What each tag byte means
+_TAG_STATE[ord("o")] = 1
+_TAG_STATE[ord("A"):ord("X") + 1] = np.arange(1, 25)
+_TAG_STATE[ord("$")] = _ROW_END
+_TAG_STATE[ord("!")] = _PATTERN_END
+_PREFIX_STATE = np.zeros(256, dtype=np.int64)
+_PREFIX_STATE[list(_PREFIXES)] = 24 * np.arange(1, 11)
+
+
+# --- Cropping ---
+def _crop(extent, size):
+    """Return (start, length) of the middle of `extent` cells that place() keeps on a board `size` long."""
+    if size is None or extent <= size:
+        return 0, extent
+    return -((size - extent) // 2), size  # The same rounding as place()
+
+
+# --- RLE ---
+def _rle_runs(data, cells, row, col, origin=(0, 0)):
+    """Write the runs in a chunk of RLE body into `cells`; return (row, col, finished).
+
+    `cells` is the window of the pattern from `origin` (row, column) on;
+    runs outside it are dropped.
+
+    The chunk is decoded with array operations rather than token by token:
+    run counts come from the digits before each tag, and every run's row and
+    column from running sums over the counts.
+    """
+    text = np.frombuffer(data, dtype=np.uint8)
+    digit = (text >= ord("0")) & (text <= ord("9"))
+    tags = np.flatnonzero(~digit)
+    if not len(tags):
+        return row, col, False
+
+    # Each digit belongs to the next tag and is worth 10**(places before that tag)
+    digits = np.flatnonzero(digit)
+    owner = np.searchsorted(tags, digits)
+    value = (text[digits] - ord("0")) * 10.0 ** (tags[owner] - 1 - digits)
+    counts = np.bincount(owner, weights=value, minlength=len(tags)).astype(np.int64)
+    counts[np.bincount(owner, minlength=len(tags)) == 0] = 1
+
+    chars = text[tags]
+    state = _TAG_STATE[chars]
+    # A state prefix carries the run count; fold it into the letter after it
+    prefixes = np.flatnonzero(_PREFIX_STATE[chars])
+    counts[prefixes + 1] = counts[prefixes]
+    state[prefixes + 1] += _PREFIX_STATE[chars[prefixes]]
+    keep = _PREFIX_STATE[chars] == 0
+    counts, state = counts[keep], state[keep]
+
+    finished = state == _PATTERN_END
+    if finished.any():
+        stop = int(finished.argmax())
+        counts, state = counts[:stop], state[:stop]
+    finished = finished.any()
+    if not len(counts):
+        return row, col, finished
+
+    breaks = state == _ROW_END
+    rows = row + np.cumsum(np.where(breaks, counts, 0)) - np.where(breaks, counts, 0)
+    lengths = np.where(breaks, 0, counts)
+    before = np.cumsum(lengths) - lengths
+    # Columns restart at every row end
+    last_break = np.maximum.accumulate(np.where(breaks, np.arange(len(breaks)), -1))
+    cols = np.where(last_break >= 0, before - before[np.maximum(last_break, 0)], col + before)
+
+    height, width = cells.shape
+    top, left = origin
+    live = ~breaks & (state > 0) & (rows >= top) & (rows < top + height)
+    first = np.maximum(cols[live], left)
+    lengths = np.clip(np.minimum(cols[live] + counts[live], left + width) - first, 0, None)
+    starts = (rows[live] - top) * width + first - left
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+    cells.reshape(-1)[offsets] = np.repeat(state[live], lengths)
+
+    if breaks[-1]:
+        return int(rows[-1] + counts[-1]), 0, finished
+    return int(rows[-1]), int(cols[-1] + counts[-1]), finished
+
+
+def read_rle(f, shape=None):
+    """Parse an RLE pattern from a binary file; return (cells, rule).
+
+    `cells` is a uint8 array of the header's size holding each cell's state
+    (b and . are 0, o and A are 1, B is 2 and so on); `rule` is the header's
+    rule string or None. The body is read and decoded CHUNK_SIZE bytes at
+    a time, straight into the array. With a board `shape`, the array only
+    covers the middle part place() would keep, so a huge header cannot ask
+    for a huge array, and reading stops once the rows below it begin.
+    """
+    for line in f:
+        line = line.strip()
+        if line and not line.startswith(b"#"):
+            break
+    else:
+        raise ValueError("RLE pattern has no header line")
+    header = _RLE_HEADER.match(line)
+    if not header:
+        raise ValueError(f"bad RLE header: {line[:80]!r}")
+    width, height = int(header[1]), int(header[2])
+    rule = header[3].decode() if header[3] else None
+    (top, height), (left, width) = (_crop(extent, size) for extent, size in zip((height, width), shape or (None, None)))
+    cells = np.zeros((height, width), dtype=np.uint8)
+
+    row = col = 0
+    carry = b""
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        data = carry + chunk.translate(None, _RLE_IGNORED)
+        if chunk:
+            # Hold back a trailing run count or state prefix; its tag is in the next chunk
+            end = len(data.rstrip(_DIGITS + _PREFIXES))
+            data, carry = data[:end], data[end:]
+        row, col, finished = _rle_runs(data, cells, row, col, (top, left))
+        if finished or not chunk or row >= top + height:
+            return cells, rule
+
+
+# --- Life 1.06 ---
+def read_life106(f, shape=None):
+    """Parse a Life 1.06 pattern (one "x y" live cell per line); return (cells, None).
+
+    Coordinates are read straight into an integer array and the cells are
+    placed in the smallest box that holds them. With a board `shape`, the
+    box is first cropped to the middle part place() would keep, so a few
+    far-apart cells cannot ask for a huge array.
+    """
+    coords = np.loadtxt(f, dtype=np.int64, comments="#", ndmin=2)
+    if not len(coords):
+        return np.zeros((1, 1), dtype=np.uint8), None
+    xs, ys = coords[:, 0], coords[:, 1]
+    origin, box = [], []
+    for values, size in zip((ys, xs), shape or (None, None)):
+        start, length = _crop(int(values.max() - values.min()) + 1, size)
+        origin.append(values.min() + start)
+        box.append(length)
+    (y0, x0), (height, width) = origin, box
+    keep = (ys >= y0) & (ys < y0 + height) & (xs >= x0) & (xs < x0 + width)
+    cells = np.zeros((height, width), dtype=np.uint8)
+    cells[ys[keep] - y0, xs[keep] - x0] = 1
+    return cells, None
+
+
+# --- Loading ---
+def load_pattern(path, shape=None):
+    """Read an RLE or Life 1.06 file, chosen by its first line; return (cells, rule).
+
+    `shape` is the board the pattern is for; cells that would not fit on it
+    are dropped while reading (see read_rle and read_life106).
+    """
+    with open(path, "rb") as f:
+        first = f.readline()
+        f.seek(0)
+        if first.lower().startswith(b"#life 1.06"):
+            return read_life106(f, shape)
+        return read_rle(f, shape)
+
+
+def place(cells, shape, dtype=np.int64):
+    """Return a board of `shape` with `cells` in the middle, cropped to fit if needed."""
+    board = np.zeros(shape, dtype=dtype)
+    spans = []
+    for size, extent in zip(shape, cells.shape):
+        # Offsets of the overlap in the board and in the pattern
+        start = (size - extent) // 2
+        length = min(size, extent)
+        spans.append((max(start, 0), max(-start, 0), length))
+    (row, prow, rows), (col, pcol, cols) = spans
+    board[row:row + rows, col:col + cols] = cells[prow:prow + rows, pcol:pcol + cols]
+    return board
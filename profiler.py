@@ -0,0 +1,147 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import numpy as np
+import pygame
+
+# --- Configuration ---
+WINDOW = 600  # Samples per scope kept for the rolling percentiles
+MAX_EVENTS = 200_000  # Timed scopes kept for export
+OVERLAY_ROWS = 8  # Scopes listed on the overlay
+OVERLAY_REFRESH = 15  # Frames between overlay text updates
+OVERLAY_KEY = pygame.K_F3
+OVERLAY_FONT_SIZE = 14
+
+PANEL_COLOR = (20, 20, 20)
+TEXT_COLOR = (230, 230, 230)
+
+_DISABLED = nullcontext()
+
+
+class _Scope:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, self.start, time.perf_counter() - self.start)
+
+
+# --- Profiler ---
+class Profiler:
+    """Named timing scopes with rolling percentiles, an overlay and file export.
+
+    Wrap code in `with PROFILER.scope("name"):`. While the profiler is
+    disabled, scope() hands back one shared do-nothing context, so an
+    instrumented hot path only pays for the call and the `with`.
+    """
+
+    def __init__(self, window=WINDOW, max_events=MAX_EVENTS):
+        self.enabled = False
+        self.show_overlay = False
+        self.window = window
+        self.samples = {}  # Scope name -> recent durations in seconds
+        self.events = deque(maxlen=max_events)  # (name, start, duration) for export
+        self._panel = None
+        self._panel_age = 0
+        self._font = None
+
+    def scope(self, name):
+        if not self.enabled:
+            return _DISABLED
+        return _Scope(self, name)
+
+    def add(self, name, start, seconds):
+        """Record one timed run of a scope."""
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+        self.events.append((name, start, seconds))
+
+    def toggle_overlay(self):
+        """Show or hide the overlay; profiling runs exactly while it is shown."""
+        self.show_overlay = self.enabled = not self.show_overlay
+        # Fonts die with pygame.quit(), so make one fresh for each showing
+        self._panel = self._font = None
+
+    def clear(self):
+        self.samples = {}
+        self.events.clear()
+        self._panel = None
+
+    def summary(self):
+        """Return {scope: {"count", "mean", "p50", "p95", "p99"}} in milliseconds over the window."""
+        result = {}
+        for name, samples in self.samples.items():
+            ms = np.fromiter(samples, dtype=float, count=len(samples)) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            result[name] = {"count": len(ms), "mean": ms.mean(), "p50": p50, "p95": p95, "p99": p99}
+        return result
+
+    # --- Export ---
+    def write_csv(self, path):
+        """Write every recorded scope as a row of name, start and duration in milliseconds."""
+        origin = self.events[0][1] if self.events else 0.0
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["scope", "start_ms", "duration_ms"])
+            for name, start, seconds in self.events:
+                writer.writerow([name, f"{(start - origin) * 1000:.4f}", f"{seconds * 1000:.4f}"])
+
+    def write_trace(self, path):
+        """Write the recorded scopes as Chrome trace JSON (chrome://tracing, Perfetto)."""
+        origin = self.events[0][1] if self.events else 0.0
+        events = [{"name": name, "ph": "X", "pid": 0, "tid": 0,
+                   "ts": (start - origin) * 1e6, "dur": seconds * 1e6}
+                  for name, start, seconds in self.events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export(self, path):
+        """Write a Chrome trace if `path` ends in .json, else CSV."""
+        if path.endswith(".json"):
+            self.write_trace(path)
+        else:
+            self.write_csv(path)
+
+    # --- Overlay ---
+    def draw(self, surface):
+        """Draw the percentile table in the top-right corner; return the rect it covers.
+
+        The panel is opaque and always the same size, so redrawing it each
+        frame covers the last one; only hiding it needs a full redraw.
+        """
+        self._panel_age -= 1
+        if self._panel is None or self._panel_age <= 0:
+            if self._font is None:
+                self._font = pygame.font.SysFont("monospace", OVERLAY_FONT_SIZE)
+            self._panel = self._render_panel(self._font)
+            self._panel_age = OVERLAY_REFRESH
+        rect = self._panel.get_rect(topright=(surface.get_width() - 5, 5))
+        return surface.blit(self._panel, rect)
+
+    def _render_panel(self, font):
+        lines = [f"{'scope':12} {'p50':>6} {'p95':>6} {'p99':>6} ms"]
+        stats = sorted(self.summary().items(), key=lambda item: -item[1]["p50"])
+        for name, s in stats[:OVERLAY_ROWS]:
+            lines.append(f"{name[:12]:12} {s['p50']:6.2f} {s['p95']:6.2f} {s['p99']:6.2f}")
+        texts = [font.render(line, True, TEXT_COLOR) for line in lines]
+        line_height = font.get_linesize()
+        width = max(font.size("m" * 40)[0], max(text.get_width() for text in texts)) + 10
+        panel = pygame.Surface((width, line_height * (OVERLAY_ROWS + 1) + 10))
+        panel.fill(PANEL_COLOR)
+        for i, text in enumerate(texts):
+            panel.blit(text, (5, 5 + i * line_height))
+        return panel
+
+
+PROFILER = Profiler()
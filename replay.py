@@ -0,0 +1,385 @@
+"""Record game sessions to compact binary logs and replay them headless.
+
+    python conway.py / dual_snake.py / cannon.py write logs via main(record=...)
+    python replay.py session.log                 # replay to the end at full speed
+    python replay.py session.log --seek 5000     # jump to tick 5000
+    python replay.py session.log --verify        # check every checkpoint is reproduced
+    python replay.py session.log --capture out.mp4   # render every tick to a video or PNGs
+"""
+import argparse
+import bisect
+import importlib
+import io
+import json
+import struct
+import sys
+import time
+
+import numpy as np
+
+# --- Configuration ---
+CHECKPOINT_INTERVAL = 600  # Ticks between state checkpoints
+
+# --- Log Format ---
+# Header: MAGIC, "<BB" (format version, length of game name), the game name,
+# then "<qI" (seed or -1 if unseeded, checkpoint interval).
+# Records follow, each a tag byte, the tick as a varint delta from the
+# previous record's tick, the payload length as a varint, and the payload.
+# INPUTS payloads are one tick's inputs, encoded per game; the tick is the
+# step that consumed them. CHECKPOINT payloads are sim.snapshot() after
+# `tick` steps, packed by pack_state(); one is always written at
+# tick 0. RESET payloads are the same, but record a state that was replaced
+# from outside the inputs (say, a loaded file), so playback must apply them.
+# END marks a cleanly closed log and carries the final tick.
+MAGIC = b"GLOG"
+VERSION = 2
+INPUTS, CHECKPOINT, END, RESET = 1, 2, 3, 4
+
+
+def _write_varint(out, n):
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data, i):
+    n = shift = 0
+    while True:
+        byte = data[i]
+        i += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, i
+        shift += 7
+
+
+# --- Snapshot Encoding ---
+# A packed snapshot is a compressed .npz archive: each array is a member of
+# its own, and member "state" holds the rest as JSON, with arrays replaced by
+# {"$array": member} and tuples by {"$tuple": [...]}. Nothing is unpickled,
+# so opening a log from someone else cannot run code.
+def _to_json(value, arrays):
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("snapshots cannot hold object arrays")
+        name = f"a{len(arrays)}"
+        arrays[name] = value
+        return {"$array": name}
+    if isinstance(value, tuple):
+        return {"$tuple": [_to_json(item, arrays) for item in value]}
+    if isinstance(value, list):
+        return [_to_json(item, arrays) for item in value]
+    if isinstance(value, dict):
+        if not all(isinstance(key, str) for key in value):
+            raise TypeError("snapshot dict keys must be strings")
+        return {key: _to_json(item, arrays) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"cannot store {type(value).__name__} in a snapshot")
+
+
+def _from_json(value, arrays):
+    if isinstance(value, list):
+        return [_from_json(item, arrays) for item in value]
+    if isinstance(value, dict):
+        if "$array" in value:
+            return arrays[value["$array"]]
+        if "$tuple" in value:
+            return tuple(_from_json(item, arrays) for item in value["$tuple"])
+        return {key: _from_json(item, arrays) for key, item in value.items()}
+    return value
+
+
+def pack_state(state):
+    arrays = {}
+    text = json.dumps(_to_json(state, arrays)).encode()
+    out = io.BytesIO()
+    np.savez_compressed(out, state=np.frombuffer(text, dtype=np.uint8), **arrays)
+    return out.getvalue()
+
+
+def unpack_state(data):
+    with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+        arrays = {name: archive[name] for name in archive.files}
+    return _from_json(json.loads(arrays.pop("state").tobytes()), arrays)
+
+
+# --- Per-game Input Codecs ---
+def _encode_keys(keys):
+    return struct.pack(f"<{len(keys)}I", *keys)
+
+
+def _decode_keys(data):
+    return list(struct.unpack(f"<{len(data) // 4}I", data))
+
+
+def _encode_edits(edits):
+    return b"".join(struct.pack("<BHH", *edit) for edit in edits)
+
+
+def _decode_edits(data):
+    return list(struct.iter_unpack("<BHH", data))
+
+
+def _move_table():
+    import dual_snake
+    return dual_snake.DIRECTIONS + [dual_snake.STUCK]
+
+
+def _encode_moves(moves):
+    table = _move_table()
+    return bytes(255 if move is None else table.index(move) for move in moves)
+
+
+def _decode_moves(data):
+    table = _move_table()
+    return [None if code == 255 else table[code] for code in data]
+
+
+# Game name -> (module, simulation class, encode inputs, decode inputs)
+CODECS = {
+    "conway": ("conway", "LifeGame", _encode_edits, _decode_edits),
+    "dual_snake": ("dual_snake", "SnakeBoard", _encode_moves, _decode_moves),
+    "cannon": ("cannon", "CannonGame", _encode_keys, _decode_keys),
+}
+
+
+def make_sim(game, seed=None):
+    """Create a fresh simulation object for `game`."""
+    module, cls, _, _ = CODECS[game]
+    return getattr(importlib.import_module(module), cls)(seed)
+
+
+# --- Recording ---
+class Recorder:
+    """Write one session's per-tick inputs and periodic checkpoints to a log.
+
+    `sim` is the game's simulation object (LifeGame, SnakeBoard or
+    CannonGame), freshly reset. Call record() once per tick, after the sim
+    has stepped, with the inputs that step was given.
+    """
+
+    def __init__(self, path, game, sim, seed=None, checkpoint_every=CHECKPOINT_INTERVAL):
+        self.sim = sim
+        self.encode = CODECS[game][2]
+        self.checkpoint_every = checkpoint_every
+        self.tick = 0
+        self._last_tick = 0
+        self._file = open(path, "wb")
+        name = game.encode()
+        self._file.write(MAGIC + struct.pack("<BB", VERSION, len(name)) + name +
+                         struct.pack("<qI", -1 if seed is None else seed, checkpoint_every))
+        self._write(CHECKPOINT, pack_state(sim.snapshot()))
+
+    def _write(self, tag, payload):
+        out = bytearray([tag])
+        _write_varint(out, self.tick - self._last_tick)
+        _write_varint(out, len(payload))
+        self._file.write(out)
+        self._file.write(payload)
+        self._last_tick = self.tick
+
+    def record(self, inputs):
+        if inputs:
+            self._write(INPUTS, self.encode(inputs))
+        self.tick += 1
+        if self.tick % self.checkpoint_every == 0:
+            self._write(CHECKPOINT, pack_state(self.sim.snapshot()))
+
+    def reset(self):
+        """Log the sim's whole state after something other than inputs replaced it."""
+        self._write(RESET, pack_state(self.sim.snapshot()))
+
+    def close(self):
+        if not self._file.closed:
+            self._write(END, b"")
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Playback ---
+class Replay:
+    """A loaded log that can be played from, or seeked to, any tick."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a replay log")
+        version, name_length = struct.unpack_from("<BB", data, 4)
+        if version != VERSION:
+            raise ValueError(f"{path} has log format {version}, expected {VERSION}")
+        i = 6 + name_length
+        self.game = data[6:i].decode()
+        seed, self.checkpoint_every = struct.unpack_from("<qI", data, i)
+        self.seed = None if seed < 0 else seed
+        self.decode = CODECS[self.game][3]
+        i += struct.calcsize("<qI")
+
+        self.inputs = {}  # tick -> encoded inputs
+        self.checkpoints = []  # (tick, packed state, tag), in log order, resets included
+        self.resets = {}  # tick -> packed state that replaced the sim's
+        self.complete = False
+        tick = 0
+        while i < len(data):
+            tag = data[i]
+            try:
+                delta, i = _read_varint(data, i + 1)
+                length, i = _read_varint(data, i)
+            except IndexError:
+                break  # Truncated by a crash inside a record's header; keep what was written
+            payload = data[i:i + length]
+            if len(payload) < length:
+                break  # Truncated by a crash; keep what was written
+            i += length
+            tick += delta
+            if tag == INPUTS:
+                self.inputs[tick] = payload
+            elif tag in (CHECKPOINT, RESET):
+                self.checkpoints.append((tick, payload, tag))
+                if tag == RESET:
+                    self.resets[tick] = payload
+            elif tag == END:
+                self.complete = True
+        self.length = max([tick] + [t + 1 for t in self.inputs])
+        self._checkpoint_ticks = [t for t, _, _ in self.checkpoints]
+
+    def run(self, sim, start, stop):
+        """Step `sim` (which is at tick `start`) through the logged inputs up to tick `stop`."""
+        for tick in range(start, stop):
+            if tick in self.resets:
+                sim.restore(unpack_state(self.resets[tick]))
+            data = self.inputs.get(tick)
+            if data is None:
+                sim.step()
+            else:
+                sim.step(self.decode(data))
+        return sim
+
+    def seek(self, tick):
+        """Return a new simulation at `tick`, started from the nearest earlier checkpoint."""
+        index = bisect.bisect_right(self._checkpoint_ticks, tick) - 1
+        start, state, _ = self.checkpoints[index]
+        sim = make_sim(self.game, self.seed)
+        sim.restore(unpack_state(state))
+        return self.run(sim, start, tick)
+
+    def verify(self):
+        """Replay from the first checkpoint and compare against every later one.
+
+        Returns the tick of the first checkpoint that was not reproduced, or
+        None if the whole log replays exactly.
+        """
+        tick, state, _ = self.checkpoints[0]
+        sim = make_sim(self.game, self.seed)
+        sim.restore(unpack_state(state))
+        for next_tick, state, tag in self.checkpoints[1:]:
+            if tag == RESET:
+                continue  # Applied by run(), so there is nothing to check
+            self.run(sim, tick, next_tick)
+            tick = next_tick
+            if not _same(sim.snapshot(), unpack_state(state)):
+                return tick
+        return None
+
+
+# --- Rendering ---
+def _open_view(game):
+    """Open a window sized for `game`; return (screen, draw), where draw(sim) paints a frame."""
+    import pygame
+
+    module = importlib.import_module(CODECS[game][0])
+    pygame.init()
+    if game == "conway":
+        screen = pygame.display.set_mode((module.WINDOW_WIDTH, module.WINDOW_HEIGHT))
+        renderer = module.GridRenderer(pygame.font.SysFont("Arial", 20), module.restart_button_rect())
+        return screen, lambda sim: renderer.draw(screen, sim.grid, sim.generation, sim.paused)
+    if game == "dual_snake":
+        screen = pygame.display.set_mode((module.WINDOW_WIDTH, module.WINDOW_HEIGHT))
+        font = pygame.font.SysFont("Arial", 24)
+        return screen, lambda sim: module.draw_board(screen, font, sim)
+    screen = pygame.display.set_mode((module.WIDTH, module.HEIGHT))
+    return screen, lambda sim: sim.render(screen)
+
+
+def render(log, path, stop=None, every=1, fps=None):
+    """Play `log` from its start to tick `stop`, capturing every `every`th tick to `path`.
+
+    Nothing waits on a clock and no frame is dropped (capture() waits for the
+    encoder instead), so a replay renders as fast as it draws and encodes.
+    Returns the number of frames written.
+    """
+    import pygame
+    from capture import CAPTURE_FPS, FrameCapture
+
+    screen, draw = _open_view(log.game)
+    start, state, _ = log.checkpoints[0]
+    sim = make_sim(log.game, log.seed)
+    sim.restore(unpack_state(state))
+    with FrameCapture(path, screen.get_size(), fps or CAPTURE_FPS, drop=False) as capturer:
+        draw(sim)
+        capturer.capture(screen)
+        for tick in range(start, log.length if stop is None else stop):
+            log.run(sim, tick, tick + 1)
+            if (tick + 1) % every == 0:
+                draw(sim)
+                capturer.capture(screen)
+    pygame.quit()
+    return capturer.written
+
+
+def _same(a, b):
+    """Deep equality for snapshots, which mix containers and NumPy arrays."""
+    if isinstance(a, dict):
+        return isinstance(b, dict) and a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)):
+        return isinstance(b, (list, tuple)) and len(a) == len(b) and all(map(_same, a, b))
+    if isinstance(a, np.ndarray):
+        return np.array_equal(a, b)
+    return a == b
+
+
+def main():
+    from headless import use_dummy_display
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log")
+    parser.add_argument("--seek", type=int, help="tick to stop at (default: the end of the log)")
+    parser.add_argument("--verify", action="store_true", help="check the replay reproduces every checkpoint")
+    parser.add_argument("--capture", metavar="PATH", help="render the replay to a video (via ffmpeg) or a PNG pattern")
+    parser.add_argument("--every", type=int, default=1, help="with --capture, render every Nth tick")
+    parser.add_argument("--fps", type=int, help="with --capture, the video's frame rate")
+    args = parser.parse_args()
+
+    use_dummy_display()
+    log = Replay(args.log)
+    print(f"{log.game}: seed {log.seed}, {log.length} ticks, {len(log.inputs)} input ticks, "
+          f"{len(log.checkpoints)} checkpoints{'' if log.complete else ' (truncated)'}")
+    if args.verify:
+        start = time.perf_counter()
+        diverged = log.verify()
+        elapsed = time.perf_counter() - start
+        print("replay matches every checkpoint" if diverged is None else f"replay diverged by tick {diverged}",
+              f"({elapsed:.2f}s)")
+        return diverged is None
+    tick = log.length if args.seek is None else args.seek
+    start = time.perf_counter()
+    if args.capture:
+        frames = render(log, args.capture, tick, args.every, args.fps)
+        print(f"rendered {frames} frames of {tick} ticks in {time.perf_counter() - start:.2f}s")
+        return True
+    log.seek(tick)
+    print(f"reached tick {tick} in {time.perf_counter() - start:.2f}s")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
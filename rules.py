@@ -0,0 +1,162 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+# --- Rule Names ---
+NAMED_RULES = {
+    "life": "B3/S23",
+    "highlife": "B36/S23",
+    "seeds": "B2/S",
+    "day & night": "B3678/S34678",
+    "brian's brain": "B2/S/C3",
+    "star wars": "B2/S345/C4",
+    "bugs": "R5,C0,M1,S34..58,B34..45,NM",
+}
+
+# Life-like rules as B/S (Golly) or S/B (MCell), with an optional Generations
+# state count and a V suffix for the von Neumann neighborhood
+_BS = re.compile(r"B(?P<birth>\d*)/S(?P<survive>\d*)(?:/[CG]?(?P<states>\d+))?(?P<shape>[MV]?)", re.IGNORECASE)
+_SB = re.compile(r"S?(?P<survive>\d*)/B?(?P<birth>\d*)(?:/[CG]?(?P<states>\d+))?(?P<shape>[MV]?)", re.IGNORECASE)
+# Larger than Life, as Golly writes it: R5,C0,M1,S34..58,B34..45,NM
+_LTL = re.compile(r"R(?P<radius>\d+),C(?P<states>\d+),M(?P<middle>[01]),"
+                  r"S(?P<s_low>\d+)(?:\.\.|-)(?P<s_high>\d+),B(?P<b_low>\d+)(?:\.\.|-)(?P<b_high>\d+),N(?P<shape>[MN])",
+                  re.IGNORECASE)
+
+
+class Rule(NamedTuple):
+    """A compiled cellular-automaton rule.
+
+    Cells hold 0 (dead), 1 (alive) or, for Generations rules, 2 and up
+    (dying, one step per generation). `table[state, count]` is a cell's next
+    state given how many live cells its neighborhood holds.
+    """
+    text: str
+    birth: frozenset
+    survive: frozenset
+    states: int
+    radius: int
+    neighborhood: str  # "M" (Moore, a square) or "N" (von Neumann, a diamond)
+    middle: bool  # Whether a cell counts itself
+    table: np.ndarray
+
+
+def neighborhood_size(radius, neighborhood, middle=False):
+    """Return how many cells a neighborhood holds."""
+    if neighborhood == "M":
+        size = (2 * radius + 1) ** 2
+    else:
+        size = 2 * radius * (radius + 1) + 1
+    return size if middle else size - 1
+
+
+def _table(birth, survive, states, max_count):
+    """Build the (state, live count) -> next state table."""
+    table = np.zeros((states, max_count + 1), dtype=np.uint8)
+    counts = np.arange(max_count + 1)
+    table[0] = np.isin(counts, list(birth))
+    # A live cell that does not survive starts dying, or just dies in two-state rules
+    table[1] = np.where(np.isin(counts, list(survive)), 1, 2 % states)
+    for state in range(2, states):
+        table[state] = (state + 1) % states
+    return table
+
+
+# --- Parsing ---
+_COMPILED = {}  # (birth, survive, states, radius, neighborhood, middle) -> its one Rule
+
+
+@lru_cache(maxsize=None)
+def parse_rule(text):
+    """Compile a rule string (or a name from NAMED_RULES) into a Rule.
+
+    Accepts B/S and S/B notation ("B36/S23", "23/36"), Generations rules
+    ("B2/S/C3", "/2/3") and Larger than Life ("R5,C0,M1,S34..58,B34..45,NM").
+    Rules are cached by what they mean, so every spelling of one rule
+    ("life", "b3/s23", "23/3") gives the same Rule object, and `rule is
+    LIFE` picks out Conway's rule however a pattern file wrote it.
+    """
+    spec = NAMED_RULES.get(text.strip().lower(), text.strip())
+    match = _LTL.fullmatch(spec)
+    if match:
+        radius, middle, shape = int(match["radius"]), match["middle"] == "1", match["shape"].upper()
+        birth = frozenset(range(int(match["b_low"]), int(match["b_high"]) + 1))
+        survive = frozenset(range(int(match["s_low"]), int(match["s_high"]) + 1))
+    else:
+        match = _BS.fullmatch(spec) or _SB.fullmatch(spec)
+        if not match:
+            raise ValueError(f"unrecognized rule {text!r}")
+        radius, middle, shape = 1, False, "N" if match["shape"].upper() == "V" else "M"
+        birth = frozenset(map(int, match["birth"]))
+        survive = frozenset(map(int, match["survive"]))
+    states = max(int(match["states"] or 2), 2)
+    max_count = neighborhood_size(radius, shape, middle)
+    if not 0 < radius or states > 256 or any(count > max_count for count in birth | survive):
+        raise ValueError(f"rule {text!r} is out of range")
+    key = (birth, survive, states, radius, shape, middle)
+    if key not in _COMPILED:
+        _COMPILED[key] = Rule(spec, birth, survive, states, radius, shape, middle,
+                              _table(birth, survive, states, max_count))
+    return _COMPILED[key]
+
+
+LIFE = parse_rule("B3/S23")
+
+
+# --- Stepping ---
+def neighbor_counts(padded, rule):
+    """Count live neighbors from a 0/1 array padded by `rule.radius` cells on its last two axes.
+
+    Neighborhoods of up to 255 cells are summed from shifted slices in
+    uint8. Bigger ones use running totals (a summed-area table for Moore
+    neighborhoods, per-row totals for von Neumann ones), whose cost does not
+    grow with the radius.
+    """
+    r = rule.radius
+    *lead, height, width = padded.shape
+    height, width = height - 2 * r, width - 2 * r
+    if padded.dtype == bool:
+        padded = padded.view(np.uint8)
+    if rule.table.shape[1] <= 256:
+        padded = padded.astype(np.uint8, copy=False)
+        if rule.neighborhood == "M":
+            # Square windows are separable: sum along columns, then along rows
+            rows = sum(padded[..., dy:dy + height, :] for dy in range(2 * r + 1))
+            counts = sum(rows[..., dx:dx + width] for dx in range(2 * r + 1))
+        else:
+            counts = sum(padded[..., r + dy:r + dy + height, r + dx:r + dx + width]
+                         for dy in range(-r, r + 1) for dx in range(abs(dy) - r, r - abs(dy) + 1))
+    elif rule.neighborhood == "M":
+        n = 2 * r + 1
+        area = np.zeros((*lead, height + 2 * r + 1, width + 2 * r + 1), dtype=np.int32)
+        area[..., 1:, 1:] = padded.cumsum(-2, dtype=np.int32).cumsum(-1, dtype=np.int32)
+        counts = area[..., n:, n:] - area[..., :-n, n:] - area[..., n:, :-n] + area[..., :-n, :-n]
+    else:
+        totals = np.zeros((*lead, height + 2 * r, width + 2 * r + 1), dtype=np.int32)
+        totals[..., 1:] = padded.cumsum(-1, dtype=np.int32)
+        counts = np.zeros((*lead, height, width), dtype=np.int32)
+        for dy in range(-r, r + 1):
+            reach = r - abs(dy)
+            rows = totals[..., r + dy:r + dy + height, :]
+            counts += rows[..., r + reach + 1:r + reach + 1 + width] - rows[..., r - reach:r - reach + width]
+    if not rule.middle:
+        counts -= padded[..., r:r + height, r:r + width]
+    return counts
+
+
+def next_states(cells, counts, rule):
+    """Look up every cell's next state from its state and live-neighbor count."""
+    index = cells.astype(np.uint16 if counts.dtype == np.uint8 else np.intp)
+    index *= rule.table.shape[1]
+    index += counts
+    return rule.table.ravel()[index]
+
+
+def step_rule(grid, rule=LIFE):
+    """Compute the next generation of a toroidal grid under `rule` (a Rule or rule string)."""
+    if isinstance(rule, str):
+        rule = parse_rule(rule)
+    alive = grid == 1 if rule.states > 2 else grid
+    counts = neighbor_counts(np.pad(alive, rule.radius, mode="wrap"), rule)
+    return next_states(grid, counts, rule).astype(grid.dtype, copy=False)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The games are flat scripts in the repository root; import them from there,
+# with SDL's dummy drivers so nothing opens a window or an audio device
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
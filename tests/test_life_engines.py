@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from conway import FAST_FORWARD, FAST_FORWARD_POWER, LifeGame, contained, step_bitpacked, step_numpy, step_python
+
+WIDTHS = [1, 63, 64, 65, 130]
+HEIGHTS = [1, 2, 17]
+GENERATIONS = 4
+
+
+def random_grid(height, width, seed):
+    return np.random.default_rng(seed).integers(0, 2, size=(height, width), dtype=np.int64)
+
+
+@pytest.mark.parametrize("engine", [step_numpy, step_bitpacked], ids=["numpy", "bitpacked"])
+@pytest.mark.parametrize("height", HEIGHTS)
+@pytest.mark.parametrize("width", WIDTHS)
+def test_engine_matches_python(engine, height, width):
+    for seed in range(3):
+        expected = got = random_grid(height, width, seed)
+        for _ in range(GENERATIONS):
+            expected = step_python(expected)
+            got = engine(got)
+            assert got.dtype == expected.dtype
+            np.testing.assert_array_equal(got, expected)
+
+
+@pytest.mark.parametrize("engine", [step_numpy, step_bitpacked], ids=["numpy", "bitpacked"])
+def test_glider_wraps_around(engine):
+    grid = np.zeros((8, 65), dtype=np.int64)
+    # A glider straddling the column where the rows wrap, past the first 64-bit word
+    for row, col in [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]:
+        grid[row, (63 + col) % 65] = 1
+    expected = grid
+    for _ in range(20):
+        expected = step_python(expected)
+        grid = engine(grid)
+    np.testing.assert_array_equal(grid, expected)
+
+
+def test_fast_forward_matches_stepping_near_the_edge():
+    # Hashlife drops what crosses the edges, so a glider about to wrap must be stepped
+    grid = np.zeros((150, 200), dtype=np.int64)
+    for row, col in [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]:
+        grid[140 + row, 190 + col] = 1
+    game = LifeGame()
+    game.load(grid)
+    game.apply((FAST_FORWARD, 0, 0))
+    expected = grid
+    for _ in range(2 ** FAST_FORWARD_POWER):
+        expected = step_numpy(expected)
+    np.testing.assert_array_equal(game.grid, expected)
+    assert not contained(grid, 8) and contained(grid, 7)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import life_parallel
+from conway import step_numpy
+from life_parallel import ParallelLife, step_parallel
+
+# Small boards, so every band is only a row or two tall and most rows read a
+# halo from a neighboring band, including across the top/bottom wrap
+SHAPES = [(3, 5), (7, 9), (10, 6)]
+GENERATIONS = 6
+
+
+def random_grid(shape, seed):
+    return np.random.default_rng(seed).integers(0, 2, size=shape, dtype=np.int64)
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("workers", [1, 3, "height"])
+def test_parallel_life_matches_numpy(shape, workers):
+    if workers == "height":
+        workers = shape[0]
+    expected = random_grid(shape, seed=sum(shape))
+    with ParallelLife(expected, workers) as engine:
+        assert engine.workers == min(workers, shape[0])
+        for _ in range(GENERATIONS):
+            expected = step_numpy(expected)
+            np.testing.assert_array_equal(engine.step(), expected)
+
+
+@pytest.mark.parametrize("workers", [1, 3, 7])
+def test_step_parallel_matches_numpy(workers):
+    expected = random_grid((7, 9), seed=workers)
+    grid = expected
+    try:
+        for _ in range(GENERATIONS):
+            expected = step_numpy(expected)
+            # Feeding the returned view back in continues without reloading
+            grid = step_parallel(grid, workers)
+            np.testing.assert_array_equal(grid, expected)
+        # A board that is not the engine's own view is loaded first
+        np.testing.assert_array_equal(step_parallel(expected.copy(), workers), step_numpy(expected))
+    finally:
+        life_parallel._close_engine()
+        life_parallel._engine = None
@@ -0,0 +1,29 @@
+import io
+import time
+
+import numpy as np
+import pytest
+
+from patterns import place, read_rle
+
+GLIDERS = b"bo$2bo$3o!"
+
+
+def test_huge_header_is_cropped_to_the_board():
+    start = time.perf_counter()
+    cells, rule = read_rle(io.BytesIO(b"x = 300000, y = 300000, rule = B3/S23\n" + GLIDERS), (150, 200))
+    assert time.perf_counter() - start < 1
+    assert cells.shape == (150, 200)
+    assert rule == "B3/S23"
+    # The glider sits in the top-left corner, far outside the middle of the pattern
+    assert not cells.any()
+
+
+@pytest.mark.parametrize("shape", [(5, 5), (4, 6), (3, 2), (2, 9), (9, 9)])
+def test_cropped_read_places_like_a_full_read(shape):
+    body = b"3o2bo$bob2o2b$4bo$2o3b2o$o2bobo$b3o2b$6o!"
+    header = b"x = 7, y = 7\n"
+    full, _ = read_rle(io.BytesIO(header + body))
+    cropped, _ = read_rle(io.BytesIO(header + body), shape)
+    assert cropped.shape == tuple(min(7, size) for size in shape)
+    np.testing.assert_array_equal(place(cropped, shape), place(full, shape))
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+import replay
+from conway import TOGGLE, LifeGame
+
+EDITS = [(TOGGLE, 3, 4), (TOGGLE, 5, 6)]
+
+
+@pytest.fixture
+def crashed_log(tmp_path):
+    """A log cut off by a crash after a last INPUTS record; return (path, where that record starts)."""
+    path = tmp_path / "session.log"
+    sim = LifeGame(1)
+    recorder = replay.Recorder(path, "conway", sim, 1)
+    sim.step(EDITS)
+    recorder.record(EDITS)
+    for _ in range(200):
+        sim.step()
+        recorder.record([])
+    recorder._file.flush()
+    start = os.path.getsize(path)
+    sim.step(EDITS)
+    recorder.record(EDITS)
+    recorder._file.close()
+    return path, start
+
+
+def test_truncated_last_record_is_dropped(crashed_log):
+    path, start = crashed_log
+    data = path.read_bytes()
+    assert set(replay.Replay(path).inputs) == {0, 201}
+    for end in range(start, len(data)):
+        path.write_bytes(data[:end])
+        log = replay.Replay(path)
+        assert set(log.inputs) == {0} and not log.complete
+
+
+def test_lone_tag_byte_is_dropped(crashed_log):
+    path, _ = crashed_log
+    path.write_bytes(path.read_bytes() + bytes([replay.INPUTS]))
+    assert set(replay.Replay(path).inputs) == {0, 201}
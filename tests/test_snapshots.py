@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from conway import load_snapshot, pack_grid, save_snapshot
+
+
+@pytest.mark.parametrize("rule, grid", [
+    ("B3/S23", [[0, 1, 1], [1, 0, 1]]),
+    ("B2/S/C3", [[0, 1, 2], [2, 0, 1]]),
+])
+def test_snapshot_round_trip(tmp_path, rule, grid):
+    path = tmp_path / "board.snapshot"
+    save_snapshot(path, np.array(grid), 12, rule)
+    got, generation, got_rule = load_snapshot(path)
+    np.testing.assert_array_equal(got, grid)
+    assert (generation, got_rule) == (12, rule)
+
+
+def test_packed_snapshot(tmp_path):
+    grid = np.random.default_rng(0).integers(0, 2, size=(5, 70))
+    path = tmp_path / "board.snapshot"
+    save_snapshot(path, pack_grid(grid), width=70)
+    np.testing.assert_array_equal(load_snapshot(path)[0], grid)